@@ -1,10 +1,17 @@
 # src/api.py
+import base64
 import json
-from typing import Optional
+import os
+from typing import Dict, List, Optional
+from backend.archive import HistoryArchiver
+from backend.blob_store import BlobStore, ThumbnailGenerator
 from backend.clipboard_service import ClipboardService
 from backend.database import ClipboardDatabase
 from backend.categorizer import ContentCategorizer
 from backend.crypto_handler import CryptoHandler
+from backend.jobs import JobManager
+from backend.secret_cache import SecretCache
+from backend.sync import ClipSyncer
 from datetime import datetime, timedelta
 
 
@@ -13,8 +20,13 @@ class ClipboardAPI:
 
     def __init__(self):
         self._database = ClipboardDatabase()
+        self._blob_store = BlobStore(os.path.join(os.path.dirname(os.path.abspath(self._database.db_path)), 'blobs'))
+        self._thumbnails = ThumbnailGenerator(self._blob_store)
+        self._archiver = HistoryArchiver(self._database)
+        self._jobs = JobManager(max_workers=3)
         self._categorizer = ContentCategorizer()
         self._crypto_handler = None
+        self._secret_cache = SecretCache(ttl=60.0, max_entries=16)
         self._clipboard_service = None
         
         self.current_theme = "light"
@@ -30,10 +42,15 @@ class ClipboardAPI:
         self.passkey_set = passkey_hash is not None
         self.current_theme = self._database.get_setting('theme', 'light')
         self.current_style = self._database.get_setting('style', 'Sunrise')
+        self.archive_after_days = int(self._database.get_setting('archive_after_days', '90'))
+        self.start_archive_job()
+        if self._database.pending_backfills():
+            self.start_backfill_job()
 
     def initialize_clipboard_service(self):
         if not self._clipboard_service:
-            self._clipboard_service = ClipboardService(self._categorizer, self._database, self._crypto_handler)
+            self._clipboard_service = ClipboardService(self._categorizer, self._database, self._crypto_handler,
+                                                       blob_store=self._blob_store)
             self._clipboard_service.load_settings()
             self._clipboard_service.start_monitoring()  # Called on main thread
         return True
@@ -48,31 +65,94 @@ class ClipboardAPI:
 
     # ============= Clip Operations =============
 
-    def get_all_clips(self, limit: int = 100) -> str:
-        clips = self._database.get_all_clips(limit)
+    def get_all_clips(self, limit: int = 100, collapse_duplicates: bool = False,
+                      include_archived: bool = False, offset: int = 0) -> str:
+        clips = self._database.get_all_clips(limit, collapse_duplicates, offset)
+        if include_archived and len(clips) < limit:
+            clips += self._archived_page(clips, limit, offset, None, collapse_duplicates)
         return json.dumps(clips)
 
-    def get_clips_by_category(self, category: str, limit: int = 100) -> str:
-        clips = self._database.get_clips_by_category(category, limit)
+    def get_clips_by_category(self, category: str, limit: int = 100, collapse_duplicates: bool = False,
+                              include_archived: bool = False, offset: int = 0) -> str:
+        clips = self._database.get_clips_by_category(category, limit, collapse_duplicates, offset)
+        if include_archived and len(clips) < limit:
+            clips += self._archived_page(clips, limit, offset, category, collapse_duplicates)
         return json.dumps(clips)
 
-    def search_clips(self, query: str) -> str:
-        clips = self._database.search_clips(query)
+    def _archived_page(self, hot: List[Dict], limit: int, offset: int, category: Optional[str],
+                       collapse_duplicates: bool) -> List[Dict]:
+        """Archived clips that continue a short page of hot clips; the archive lists after the hot table"""
+        if hot or not offset:
+            hot_total = offset + len(hot)
+        else:
+            hot_total = self._database.count_clips(category, collapse_duplicates)
+        return self._archiver.get_archived_clips(limit - len(hot), category, offset + len(hot) - hot_total)
+
+    def search_clips(self, query: str, collapse_duplicates: bool = False, include_archived: bool = False) -> str:
+        clips = self._database.search_clips(query, collapse_duplicates=collapse_duplicates)
+        if include_archived and len(clips) < 50:
+            clips += self._archiver.search_archive(query, 50 - len(clips))
+        if not clips and len(query.strip()) >= 3:
+            # Nothing contains the query verbatim, fall back to typo-tolerant matching
+            clips = self._database.fuzzy_search_clips(query)
         return json.dumps(clips)
 
+    def fuzzy_search_clips(self, query: str, limit: int = 50) -> str:
+        clips = self._database.fuzzy_search_clips(query, limit)
+        return json.dumps(clips)
+
+    def merge_near_duplicates(self) -> int:
+        return self._database.merge_near_duplicates()
+
+    def get_clips_by_entity(self, kind: str, value: str, limit: int = 100) -> str:
+        clips = self._database.get_clips_by_entity(kind, value, limit)
+        return json.dumps(clips)
+
+    def get_clips_by_domain(self, domain: str, limit: int = 100) -> str:
+        clips = self._database.get_clips_by_domain(domain, limit)
+        return json.dumps(clips)
+
+    def get_entities(self, kind: str, limit: int = 100) -> str:
+        return json.dumps(self._database.get_entities(kind, limit))
+
+    def get_top_domains(self, limit: int = 20) -> str:
+        return json.dumps(self._database.get_top_domains(limit))
+
+    def quick_paste(self, query: str = '', limit: int = 10) -> str:
+        """Most frecent clips matching query, for the keyboard palette; served from memory"""
+        return json.dumps(self._database.quick_paste(query, limit))
+
     def copy_clip(self, clip_id: int) -> bool:
-        clips = self._database.get_all_clips()
-        clip = next((c for c in clips if c['id'] == clip_id), None)
+        clip = self._database.get_clip_by_id(clip_id)
+        if not clip:
+            clip = self._archiver.get_clip(clip_id)
         if not clip:
             return False
 
+        copied = self._copy_to_clipboard(clip)
+        if copied:
+            # Archived clips are not in the live table, so their use is simply not counted
+            self._database.record_use(clip_id)
+        return copied
+
+    def _copy_to_clipboard(self, clip: dict) -> bool:
+        if clip.get('blob_hash'):
+            data = self._blob_store.read(clip['blob_hash'])
+            if data is None or not self._clipboard_service:
+                return False
+            self._clipboard_service.copy_blob_to_clipboard(clip, data)
+            return True
+
+        if clip['category'] == 'files':
+            if not self._clipboard_service:
+                return False
+            self._clipboard_service.copy_files_to_clipboard(clip['content'].split('\n'))
+            return True
+
         content = clip['content']
         if clip['is_encrypted'] and clip.get('encrypted_data'):
-            if not self.crypto_handler:
-                return False
-            try:
-                content = self.crypto_handler.decrypt(clip['encrypted_data'])
-            except:
+            content = self._decrypt_clip(clip)
+            if content is None:
                 return False
 
         if self._clipboard_service:
@@ -80,8 +160,41 @@ class ClipboardAPI:
             return True
         return False
 
+    def _decrypt_clip(self, clip: dict) -> Optional[str]:
+        """Plaintext of an encrypted clip, served from the short-lived secret cache when possible"""
+        if not self._crypto_handler:
+            return None
+        # Keyed on the ciphertext too, so an edited secret is never served stale
+        key = (clip['id'], bytes(clip['encrypted_data']))
+        content = self._secret_cache.get(key)
+        if content is None:
+            try:
+                content = self._crypto_handler.decrypt(clip['encrypted_data'])
+            except ValueError:
+                return None
+            self._secret_cache.put(key, content)
+        return content
+
     def delete_clip(self, clip_id: int) -> bool:
-        return self._database.delete_clip(clip_id)
+        clip = self._database.get_clip_by_id(clip_id)
+        deleted = self._database.delete_clip(clip_id)
+        blob_hash = clip.get('blob_hash') if deleted and clip else None
+        # Other clips, hot or archived, may share the same content-addressed payload
+        if (blob_hash and not self._database.find_clip_by_blob(blob_hash)
+                and not self._archiver.references_blob(blob_hash)):
+            self._blob_store.delete(blob_hash)
+            self._thumbnails.delete(blob_hash)
+        return deleted
+
+    def get_clip_thumbnail(self, clip_id: int) -> str:
+        """Return a data URI for an image clip's thumbnail, or '' while it is being rendered"""
+        clip = self._database.get_clip_by_id(clip_id) or self._archiver.get_clip(clip_id)
+        if not clip or clip['category'] != 'image' or not clip.get('blob_hash'):
+            return ''
+        png = self._thumbnails.get(clip['blob_hash'])
+        if png is None:
+            return ''
+        return 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
 
     def toggle_pin(self, clip_id: int) -> bool:
         return self._database.toggle_pin(clip_id)
@@ -97,9 +210,10 @@ class ClipboardAPI:
         import hashlib
         passkey_hash = hashlib.sha256(passkey.encode()).hexdigest()
         self._database.set_setting('passkey_hash', passkey_hash)
-        self.crypto_handler = CryptoHandler(passkey)
+        self._crypto_handler = CryptoHandler(passkey)
+        self._secret_cache.clear()
         if self._clipboard_service:
-            self._clipboard_service.crypto_handler = self.crypto_handler
+            self._clipboard_service.crypto_handler = self._crypto_handler
         self.passkey_set = True
         self.password_locked = False
         return True
@@ -110,6 +224,7 @@ class ClipboardAPI:
         stored_hash = self._database.get_setting('passkey_hash')
         if passkey_hash == stored_hash:
             self._crypto_handler = CryptoHandler(passkey)
+            self._secret_cache.clear()
             if self._clipboard_service:
                 self._clipboard_service.crypto_handler = self._crypto_handler
             self.password_locked = False
@@ -119,6 +234,7 @@ class ClipboardAPI:
     def lock_passwords(self) -> bool:
         self.password_locked = True
         self._crypto_handler = None
+        self._secret_cache.clear()
         if self._clipboard_service:
             self._clipboard_service.crypto_handler = None
         return True
@@ -158,7 +274,7 @@ class ClipboardAPI:
     # ============= Utilities =============
 
     def get_category_info(self) -> str:
-        categories = ['url', 'email', 'phone', 'password', 'code', 'text']
+        categories = ['url', 'email', 'phone', 'password', 'code', 'image', 'html', 'files', 'text']
         info = {
             cat: {
                 'color': self._categorizer.get_category_color(cat),
@@ -167,8 +283,27 @@ class ClipboardAPI:
         }
         return json.dumps(info)
 
+    def get_stats(self, days: int = 30) -> str:
+        stats = self._database.get_stats(days)
+        stats['archived_count'] = self._archiver.get_archived_count()
+        return json.dumps(stats)
+
+    def get_capture_metrics(self) -> str:
+        if not self._clipboard_service:
+            return json.dumps({})
+        return json.dumps(self._clipboard_service.get_pipeline_metrics())
+
     def cleanup_old_clips(self, days: int = 30) -> int:
-        return self._database.cleanup_old_clips(days)
+        deleted = self._database.cleanup_old_clips(days) + self._archiver.cleanup_old_clips(days)
+        referenced = set(self._database.get_blob_hashes()) | set(self._archiver.get_blob_hashes())
+        self._blob_store.collect_garbage(referenced)
+        return deleted
+
+    def archive_old_clips(self, days: Optional[int] = None) -> int:
+        if days is not None:
+            self.archive_after_days = days
+            self._database.set_setting('archive_after_days', str(days))
+        return self._archiver.archive_old_clips(self.archive_after_days)
 
     def export_clips(self) -> str:
         clips = self._database.get_all_clips(limit=10000)
@@ -194,10 +329,111 @@ class ClipboardAPI:
             self._database.write_clip(clip)  # customize for your schema
         return {'status': 'success'}
 
+    # ============= Background Jobs =============
+
+    def get_job(self, job_id: str) -> str:
+        return json.dumps(self._jobs.get(job_id))
+
+    def list_jobs(self) -> str:
+        return json.dumps(self._jobs.list())
+
+    def cancel_job(self, job_id: str) -> bool:
+        return self._jobs.cancel(job_id)
+
+    def start_export_job(self) -> str:
+        return self._jobs.submit('export', self._run_export)
+
+    def start_import_job(self, data: str) -> str:
+        return self._jobs.submit('import', self._run_import, data)
+
+    def start_cleanup_job(self, days: int = 30) -> str:
+        return self._jobs.submit('cleanup', self._run_cleanup, days)
+
+    def start_archive_job(self, days: Optional[int] = None) -> str:
+        if days is not None:
+            self.archive_after_days = days
+            self._database.set_setting('archive_after_days', str(days))
+        return self._jobs.submit('archive', self._run_archive, self.archive_after_days)
+
+    def start_backfill_job(self) -> str:
+        """Finish data migrations left by a schema upgrade, in the background"""
+        return self._jobs.submit('backfill', self._run_backfills)
+
+    def start_passkey_setup_job(self, passkey: str) -> str:
+        return self._jobs.submit('passkey', lambda job: self.setup_passkey(passkey))
+
+    @staticmethod
+    def _json_default(value):
+        if isinstance(value, bytes):
+            return base64.b64encode(value).decode('ascii')
+        raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+    def _run_export(self, job, batch_size: int = 500) -> str:
+        """Stream every clip to the export file in batches, reporting progress"""
+        total = self._database.get_stats()['total']['clip_count']
+        export_path = self.Path.home() / "Desktop" / "clipbox_export.json"
+        tmp_path = export_path.with_suffix('.json.tmp')
+
+        done, after_id = 0, 0
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write('[')
+                while True:
+                    batch = self._database.iter_clip_batches(after_id, batch_size)
+                    if not batch:
+                        break
+                    for clip in batch:
+                        f.write(',\n' if done else '\n')
+                        f.write(json.dumps(clip, indent=2, default=self._json_default))
+                        done += 1
+                    after_id = batch[-1]['id']
+                    job.report(done, total)
+                f.write('\n]')
+            os.replace(tmp_path, export_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return str(export_path)
+
+    def _run_import(self, job, data: str) -> int:
+        clips = json.loads(data)
+        for i, clip in enumerate(clips, 1):
+            if isinstance(clip.get('encrypted_data'), str):
+                clip['encrypted_data'] = base64.b64decode(clip['encrypted_data'])
+            self._database.write_clip(clip)
+            if i % 100 == 0:
+                job.report(i, len(clips))
+        job.report(len(clips), len(clips))
+        return len(clips)
+
+    def _run_cleanup(self, job, days: int, batch_size: int = 500) -> int:
+        deleted = 0
+        while True:
+            count = self._database.cleanup_old_clips(days, batch_size)
+            if not count:
+                break
+            deleted += count
+            job.report(deleted, message=f'Deleted {deleted} clips')
+        deleted += self._archiver.cleanup_old_clips(days)
+        referenced = set(self._database.get_blob_hashes()) | set(self._archiver.get_blob_hashes())
+        self._blob_store.collect_garbage(referenced)
+        return deleted
+
+    def _run_archive(self, job, days: int) -> int:
+        return self._archiver.archive_old_clips(days, job=job)
+
+    def _run_backfills(self, job) -> int:
+        return self._database.run_backfills(job=job)
+
+    def sync_with_file(self, path: str) -> str:
+        """Exchange changes with another clip database file"""
+        syncer = ClipSyncer(self._database, self._blob_store)
+        return json.dumps(syncer.sync_with_file(path))
+
     def manual_add_clip(self, content: str, category: str) -> bool:
         if not content.strip():
             return False
-        if self._database.check_duplicate(content):
+        if self._database.check_duplicate(content, category):
             return False
         encrypted_data = None
         if category == 'password' and self._crypto_handler:
@@ -0,0 +1,258 @@
+# src/backend/archive.py
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class HistoryArchiver:
+    """
+    Moves cold clips out of the hot database into monthly archive files.
+
+    Clips older than a threshold that are neither pinned nor favorited are
+    moved in batches to archive_YYYY_MM.db next to the main database. Archives
+    are only ATTACHed (read-only) when a list or search asks for older data,
+    so indexes, scans and vacuums of the hot database stay proportional to
+    recent history.
+    """
+
+    ALIAS = 'archive'
+
+    def __init__(self, database, archive_dir: Optional[str] = None):
+        self.database = database
+        self.archive_dir = archive_dir or os.path.join(
+            os.path.dirname(os.path.abspath(database.db_path)), 'archive'
+        )
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+    @property
+    def connection(self):
+        return self.database.connection
+
+    def archive_path(self, month: str) -> str:
+        return os.path.join(self.archive_dir, f'archive_{month}.db')
+
+    def _attach(self, month: str, read_only: bool = True):
+        path = self.archive_path(month)
+        if read_only:
+            target = Path(path).as_uri() + '?mode=ro'
+        else:
+            target = path
+        self.connection.execute(f'ATTACH DATABASE ? AS {self.ALIAS}', (target,))
+
+    def _detach(self):
+        self.connection.execute(f'DETACH DATABASE {self.ALIAS}')
+
+    def _columns(self, schema: str) -> List[str]:
+        cursor = self.connection.execute(f'PRAGMA {schema}.table_info(clips)')
+        return [row[1] for row in cursor.fetchall()]
+
+    def _prepare_archive_schema(self) -> List[str]:
+        """Create or widen the attached archive's clips table; returns the shared columns"""
+        alias = self.ALIAS
+        self.connection.execute(
+            f'CREATE TABLE IF NOT EXISTS {alias}.clips AS SELECT * FROM main.clips WHERE 0'
+        )
+        self.connection.execute(
+            f'CREATE INDEX IF NOT EXISTS {alias}.idx_archive_timestamp ON clips(timestamp)'
+        )
+        self.connection.execute(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS {alias}.idx_archive_id ON clips(id)'
+        )
+        archived = set(self._columns(alias))
+        for column in self._columns('main'):
+            if column not in archived:
+                self.connection.execute(f'ALTER TABLE {alias}.clips ADD COLUMN {column}')
+        return self._columns('main')
+
+    # ============= Moving clips =============
+
+    def archive_old_clips(self, days: int = 90, batch_size: int = 500, job=None) -> int:
+        """Move cold clips into monthly archives; returns the number moved"""
+        moved = 0
+        while True:
+            if job:
+                job.report(moved, message=f'Archived {moved} clips')
+            with self.database.lock:
+                rows = self.connection.execute('''
+                    SELECT id, strftime('%Y_%m', timestamp) AS month FROM clips
+                    WHERE datetime(timestamp) < datetime('now', '-' || ? || ' days')
+                    AND is_pinned = 0 AND is_favorite = 0
+                    ORDER BY id
+                    LIMIT ?
+                ''', (days, batch_size)).fetchall()
+            if not rows:
+                break
+
+            by_month: Dict[str, List[int]] = defaultdict(list)
+            for row in rows:
+                by_month[row['month'] or 'undated'].append(row['id'])
+
+            for month, clip_ids in by_month.items():
+                self._move_batch(month, clip_ids)
+                moved += len(clip_ids)
+        return moved
+
+    def _move_batch(self, month: str, clip_ids: List[int]):
+        """Copy one month's batch into its archive and delete it from the hot table atomically"""
+        with self.database.lock:
+            self._move_batch_locked(month, clip_ids)
+
+    def _move_batch_locked(self, month: str, clip_ids: List[int]):
+        self.connection.commit()
+        self._attach(month, read_only=False)
+        try:
+            columns = ', '.join(self._prepare_archive_schema())
+            placeholders = ','.join('?' * len(clip_ids))
+            cursor = self.connection.cursor()
+            cursor.execute(f'''
+                INSERT OR REPLACE INTO {self.ALIAS}.clips ({columns})
+                SELECT {columns} FROM main.clips WHERE id IN ({placeholders})
+            ''', clip_ids)
+            self.database._keep_logged_content(cursor, clip_ids)
+            self.database._delete_ids(cursor, clip_ids, log=False)  # archiving is not a deletion
+            cursor.execute('''
+                INSERT INTO archives (month, clip_count, min_id, max_id) VALUES (?, ?, ?, ?)
+                ON CONFLICT(month) DO UPDATE SET
+                    clip_count = clip_count + excluded.clip_count,
+                    min_id = MIN(min_id, excluded.min_id),
+                    max_id = MAX(max_id, excluded.max_id)
+            ''', (month, len(clip_ids), min(clip_ids), max(clip_ids)))
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            self._detach()
+
+    # ============= Retention =============
+
+    def cleanup_old_clips(self, days: int) -> int:
+        """Apply the history retention to the archives too; returns the number of clips deleted"""
+        deleted = 0
+        for month in self.get_months():
+            with self.database.lock:
+                deleted += self._expire_month_locked(month, days)
+        return deleted
+
+    def _expire_month_locked(self, month: str, days: int) -> int:
+        """Delete one month's expired clips, or its whole file once nothing in it is left"""
+        expired = f"datetime(timestamp) < datetime('now', '-' || ? || ' days')"
+        self.connection.commit()
+        self._attach(month, read_only=False)
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(f'SELECT uuid FROM {self.ALIAS}.clips WHERE {expired}', (days,))
+            uuids = [row['uuid'] for row in cursor.fetchall()]
+            if not uuids:
+                return 0
+            cursor.execute(f'SELECT COUNT(*) FROM {self.ALIAS}.clips')
+            remaining = cursor.fetchone()[0] - len(uuids)
+            for clip_uuid in uuids:
+                if clip_uuid is not None:  # Archived before it was ever synced
+                    self.database._log_change(cursor, clip_uuid, 'delete')
+            if remaining:
+                cursor.execute(f'DELETE FROM {self.ALIAS}.clips WHERE {expired}', (days,))
+                cursor.execute('UPDATE archives SET clip_count = ? WHERE month = ?', (remaining, month))
+            else:
+                cursor.execute('DELETE FROM archives WHERE month = ?', (month,))
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            self._detach()
+        if not remaining:
+            os.remove(self.archive_path(month))
+        return len(uuids)
+
+    # ============= Reading archives =============
+
+    def get_months(self) -> List[str]:
+        """Archive months, newest first"""
+        with self.database.lock:
+            rows = self.connection.execute('SELECT month FROM archives ORDER BY month DESC').fetchall()
+        return [row['month'] for row in rows if os.path.exists(self.archive_path(row['month']))]
+
+    def get_archived_count(self) -> int:
+        """Total archived clips, read from the catalog without attaching anything"""
+        with self.database.lock:
+            row = self.connection.execute('SELECT COALESCE(SUM(clip_count), 0) AS total FROM archives').fetchone()
+        return row['total']
+
+    @contextmanager
+    def _attached(self, month: str):
+        """Hold the lock with one archive attached read-only"""
+        with self.database.lock:
+            self.connection.commit()
+            self._attach(month)
+            try:
+                yield self.connection
+            finally:
+                self._detach()
+
+    def _query_archives(self, sql: str, params: tuple, limit: int, months: Optional[List[str]] = None) -> List[Dict]:
+        """Run sql against archives newest first, attaching one at a time, until limit rows"""
+        results = []
+        for month in months if months is not None else self.get_months():
+            if len(results) >= limit:
+                break
+            with self._attached(month) as connection:
+                cursor = connection.execute(sql, (*params, limit - len(results)))
+                results.extend(dict(row, archived=True, archive_month=month) for row in cursor.fetchall())
+        return results
+
+    def get_archived_clips(self, limit: int = 100, category: Optional[str] = None, offset: int = 0) -> List[Dict]:
+        """List archived clips, newest first, skipping the first offset"""
+        where, params = ('WHERE category = ?', (category,)) if category else ('', ())
+        results = []
+        for month in self.get_months():
+            if len(results) >= limit:
+                break
+            with self._attached(month) as connection:
+                if offset:
+                    # Whole months before the page are skipped by their size alone
+                    count = connection.execute(f'SELECT COUNT(*) FROM {self.ALIAS}.clips {where}', params).fetchone()[0]
+                    if count <= offset:
+                        offset -= count
+                        continue
+                cursor = connection.execute(f'''
+                    SELECT * FROM {self.ALIAS}.clips {where}
+                    ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?
+                ''', (*params, limit - len(results), offset))
+                offset = 0
+                results.extend(dict(row, archived=True, archive_month=month) for row in cursor.fetchall())
+        return results
+
+    def search_archive(self, query: str, limit: int = 50) -> List[Dict]:
+        """Search archived clips by content, newest first"""
+        return self._query_archives(f'''
+            SELECT * FROM {self.ALIAS}.clips WHERE content LIKE ?
+            ORDER BY timestamp DESC LIMIT ?
+        ''', (f'%{query}%',), limit)
+
+    def get_blob_hashes(self) -> List[str]:
+        """Blob hashes referenced by archived clips, so blob GC keeps them"""
+        rows = self._query_archives(f'''
+            SELECT DISTINCT blob_hash FROM {self.ALIAS}.clips WHERE blob_hash IS NOT NULL LIMIT ?
+        ''', (), 1 << 62)
+        return [row['blob_hash'] for row in rows]
+
+    def references_blob(self, blob_hash: str) -> bool:
+        """Whether any archived clip still points at the blob"""
+        return bool(self._query_archives(f'''
+            SELECT id FROM {self.ALIAS}.clips WHERE blob_hash = ? LIMIT ?
+        ''', (blob_hash,), 1))
+
+    def get_clip(self, clip_id: int) -> Optional[Dict]:
+        """Fetch an archived clip by id, attaching only the archive whose id range covers it"""
+        with self.database.lock:
+            rows = self.connection.execute(
+                'SELECT month FROM archives WHERE ? BETWEEN min_id AND max_id ORDER BY month DESC', (clip_id,)
+            ).fetchall()
+        months = [row['month'] for row in rows if os.path.exists(self.archive_path(row['month']))]
+        clips = self._query_archives(f'''
+            SELECT * FROM {self.ALIAS}.clips WHERE id = ? LIMIT ?
+        ''', (clip_id,), 1, months)
+        return clips[0] if clips else None
@@ -0,0 +1,185 @@
+# src/backend/blob_store.py
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+
+class BlobStore:
+    """
+    Content-addressed storage for clipboard payloads.
+
+    Each payload is written once to <root>/<aa>/<sha256> and shared by every
+    clip that references the same hash, so repeated copies cost one file.
+    """
+
+    # Blobs written more recently than this are never collected: the capture
+    # pipeline stores a blob before the persist stage commits the clip using it
+    GC_GRACE_SECONDS = 3600
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def path_for(self, blob_hash: str) -> str:
+        return os.path.join(self.root, blob_hash[:2], blob_hash)
+
+    def contains(self, blob_hash: str) -> bool:
+        return os.path.exists(self.path_for(blob_hash))
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its hash; existing blobs are not rewritten"""
+        blob_hash = self.hash_bytes(data)
+        path = self.path_for(blob_hash)
+        if os.path.exists(path):
+            try:
+                os.utime(path)  # A new reference is on its way; restart the GC grace period
+            except FileNotFoundError:
+                pass
+            else:
+                return blob_hash
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)  # atomic, a concurrent writer produces identical bytes
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return blob_hash
+
+    def read(self, blob_hash: str) -> Optional[bytes]:
+        """Read a blob through a memory map, or None if it is missing"""
+        path = self.path_for(blob_hash)
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b''
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return mapped[:]
+        except FileNotFoundError:
+            return None
+
+    def delete(self, blob_hash: str):
+        try:
+            os.remove(self.path_for(blob_hash))
+        except FileNotFoundError:
+            pass
+
+    def collect_garbage(self, referenced: Iterable[str]) -> int:
+        """Delete blobs that no clip references anymore; returns the number removed"""
+        keep = set(referenced)
+        cutoff = time.time() - self.GC_GRACE_SECONDS
+        removed = 0
+        thumb_dir = os.path.join(self.root, 'thumbs')
+        if os.path.isdir(thumb_dir):
+            for name in os.listdir(thumb_dir):
+                if name.endswith('.tmp') or name.split('_', 1)[0] in keep:
+                    continue
+                # A thumbnail can be rendered for a blob whose clip is not committed yet
+                path = os.path.join(thumb_dir, name)
+                try:
+                    if os.path.getmtime(path) > cutoff:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+        for shard in os.listdir(self.root):
+            shard_path = os.path.join(self.root, shard)
+            if len(shard) != 2 or not os.path.isdir(shard_path):
+                continue
+            for name in os.listdir(shard_path):
+                if name.startswith('.tmp-') or name in keep:
+                    continue
+                path = os.path.join(shard_path, name)
+                try:
+                    if os.path.getmtime(path) > cutoff:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+        return removed
+
+
+class ThumbnailGenerator:
+    """Lazily renders image thumbnails on a small worker pool"""
+
+    def __init__(self, blob_store: BlobStore, size: int = 256, max_workers: int = 2):
+        self.blob_store = blob_store
+        self.size = size
+        self.thumb_dir = os.path.join(blob_store.root, 'thumbs')
+        os.makedirs(self.thumb_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbnail')
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def thumbnail_path(self, blob_hash: str) -> str:
+        return os.path.join(self.thumb_dir, f'{blob_hash}_{self.size}.png')
+
+    def get(self, blob_hash: str) -> Optional[bytes]:
+        """
+        Return PNG thumbnail bytes if already rendered.
+        Otherwise schedule rendering and return None; callers poll again later.
+        """
+        path = self.thumbnail_path(blob_hash)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+
+        with self._lock:
+            if blob_hash not in self._pending:
+                self._pending.add(blob_hash)
+                self._executor.submit(self._render, blob_hash)
+        return None
+
+    def _render(self, blob_hash: str):
+        try:
+            from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, Qt
+            from PyQt6.QtGui import QImage
+
+            data = self.blob_store.read(blob_hash)
+            if not data:
+                return
+            image = QImage.fromData(data)
+            if image.isNull():
+                return
+            thumb = image.scaled(self.size, self.size, Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+
+            png = QByteArray()
+            buffer = QBuffer(png)
+            buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+            thumb.save(buffer, 'PNG')
+            buffer.close()
+
+            path = self.thumbnail_path(blob_hash)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(bytes(png))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Thumbnail error for {blob_hash}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(blob_hash)
+
+    def delete(self, blob_hash: str):
+        try:
+            os.remove(self.thumbnail_path(blob_hash))
+        except FileNotFoundError:
+            pass
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -1,6 +1,9 @@
 # src/backend/categorizer.py
 import re
-from typing import Tuple
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from backend.secret_scanner import SecretScanner
 
 class ContentCategorizer:
     """Categorize clipboard content using regex patterns"""
@@ -15,7 +18,9 @@ class ContentCategorizer:
     )
     
     PHONE_PATTERN = re.compile(
-        r'(\+\d{1,3}[- ]?)?\(?\d{3}\)?[- ]?\d{3}[- ]?\d{4}|\+\d{10,15}'
+        # Digit guards keep long ids, timestamps and card numbers from matching in part;
+        # the leading lookahead lets the engine skip text that cannot start a number
+        r'(?=[+(\d])(?<!\d)(?:(\+\d{1,3}[- ]?)?\(?\d{3}\)?[- ]?\d{3}[- ]?\d{4}|\+\d{10,15})(?!\d)'
     )
     
     # Code patterns - detect common programming syntax
@@ -28,6 +33,9 @@ class ContentCategorizer:
     
     # Password heuristics
     PASSWORD_INDICATORS = ['password', 'passwd', 'pwd', 'pass', 'secret', 'key', 'token']
+
+    # API keys, private keys, JWTs, card numbers... found anywhere in a clip
+    SECRET_SCANNER = SecretScanner()
     
     @staticmethod
     def categorize(content: str) -> str:
@@ -39,13 +47,17 @@ class ContentCategorizer:
             return 'text'
         
         content_lower = content.lower()
+
+        # A credential anywhere makes the whole clip a password, so it gets encrypted
+        if ContentCategorizer.SECRET_SCANNER.contains_secret(content):
+            return 'password'
         
         # Check for URLs
         if ContentCategorizer.URL_PATTERN.search(content):
             return 'url'
         
         # Check for emails
-        if ContentCategorizer.EMAIL_PATTERN.search(content):
+        if '@' in content and ContentCategorizer.EMAIL_PATTERN.search(content):
             return 'email'
         
         # Check for phone numbers
@@ -66,6 +78,56 @@ class ContentCategorizer:
         # Default to text
         return 'text'
     
+    @staticmethod
+    def normalize_domain(host: str) -> Optional[str]:
+        """Lowercase a host name and drop port, credentials and a leading 'www.'"""
+        host = (host or '').rsplit('@', 1)[-1].split(':', 1)[0].strip('.').lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        return host or None
+
+    @staticmethod
+    def extract_entities(content: str) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        Find every URL, email and phone number in content
+        Returns: unique (kind, value, domain) tuples; domain is None for phones
+        """
+        if not content:
+            return []
+
+        entities = []
+        seen = set()
+
+        def add(kind, value, domain=None):
+            if value and (kind, value) not in seen:
+                seen.add((kind, value))
+                entities.append((kind, value, domain))
+
+        url_spans = []
+        for match in ContentCategorizer.URL_PATTERN.finditer(content):
+            url_spans.append(match.span())
+            url = match.group(0).rstrip('.,;:!?)\'"')
+            try:
+                host = urlsplit(url).hostname
+            except ValueError:
+                continue
+            add('url', url, ContentCategorizer.normalize_domain(host))
+
+        if '@' in content:
+            for match in ContentCategorizer.EMAIL_PATTERN.finditer(content):
+                email = match.group(0).lower()
+                add('email', email, ContentCategorizer.normalize_domain(email.split('@', 1)[1]))
+
+        for match in ContentCategorizer.PHONE_PATTERN.finditer(content):
+            # Digits inside a URL (ids, timestamps) are not phone numbers
+            if any(start <= match.start() < end for start, end in url_spans):
+                continue
+            raw = match.group(0)
+            digits = re.sub(r'\D', '', raw)
+            add('phone', ('+' if raw.lstrip().startswith('+') else '') + digits)
+
+        return entities
+
     @staticmethod
     def get_category_color(category: str) -> str:
         """Return color code for category"""
@@ -75,6 +137,9 @@ class ContentCategorizer:
             'phone': '#F59E0B',    # Amber
             'password': '#EF4444', # Red
             'code': '#8B5CF6',     # Purple
+            'image': '#EC4899',    # Pink
+            'html': '#F97316',     # Orange
+            'files': '#14B8A6',    # Teal
             'text': '#6B7280'      # Gray
         }
         return colors.get(category, '#6B7280')
@@ -88,6 +153,9 @@ class ContentCategorizer:
             'phone': '📞',
             'password': '🔒',
             'code': '💻',
+            'image': '🖼️',
+            'html': '🌐',
+            'files': '📁',
             'text': '📝'
         }
         return icons.get(category, '📝')
@@ -0,0 +1,191 @@
+# src/backend/clipboard_backend.py
+import hashlib
+import re
+import struct
+import threading
+from typing import List, Optional
+
+
+class ClipboardPayload:
+    """Snapshot of the clipboard in the richest format that was captured"""
+
+    TEXT = 'text'
+    IMAGE = 'image'
+    HTML = 'html'
+    FILES = 'files'
+
+    TAG_PATTERN = re.compile(r'<[^>]+>')
+
+    def __init__(self, kind: str, text: str = '', data: Optional[bytes] = None,
+                 mime_type: Optional[str] = None, files: Optional[List[str]] = None,
+                 width: int = 0, height: int = 0):
+        self.kind = kind
+        self.text = text or ''
+        self.data = data
+        self.mime_type = mime_type
+        self.files = list(files or [])
+        self.width = width
+        self.height = height
+
+    @property
+    def fingerprint(self) -> str:
+        """Cheap identity used to skip re-processing an unchanged clipboard"""
+        if self.data is not None:
+            return f'{self.kind}:{hashlib.sha256(self.data).hexdigest()}'
+        if self.files:
+            return f'{self.kind}:' + '\n'.join(self.files)
+        return f'{self.kind}:{self.text.strip()}'
+
+    def summary(self) -> str:
+        """Text stored in the clips table for payloads without usable text"""
+        if self.kind == self.IMAGE:
+            return f'[Image {self.width}x{self.height}]'
+        if self.kind == self.FILES:
+            return '\n'.join(self.files)
+        if self.kind == self.HTML and not self.text.strip() and self.data:
+            html = self.data.decode('utf-8', errors='replace')
+            return ' '.join(self.TAG_PATTERN.sub(' ', html).split())
+        return self.text.strip()
+
+
+class ClipboardBackend:
+    """Source of clipboard payloads; subclasses wrap a platform clipboard"""
+
+    def sequence_number(self) -> Optional[int]:
+        """Counter that changes whenever the clipboard does, or None if unsupported"""
+        return None
+
+    def read(self) -> Optional[ClipboardPayload]:
+        raise NotImplementedError
+
+
+class Win32ClipboardBackend(ClipboardBackend):
+    """Reads text, HTML, images and file lists through win32clipboard"""
+
+    BI_BITFIELDS = 3
+
+    def __init__(self):
+        import win32clipboard
+        self._clipboard = win32clipboard
+        self._html_format = win32clipboard.RegisterClipboardFormat('HTML Format')
+
+    def sequence_number(self) -> Optional[int]:
+        try:
+            return self._clipboard.GetClipboardSequenceNumber()
+        except Exception:
+            return None
+
+    def read(self) -> Optional[ClipboardPayload]:
+        wc = self._clipboard
+        try:
+            wc.OpenClipboard()
+        except Exception as e:
+            print(f"Clipboard access error: {e}")
+            return None
+
+        try:
+            if wc.IsClipboardFormatAvailable(wc.CF_HDROP):
+                files = wc.GetClipboardData(wc.CF_HDROP)
+                return ClipboardPayload(ClipboardPayload.FILES, files=list(files))
+
+            if wc.IsClipboardFormatAvailable(wc.CF_DIB):
+                dib = wc.GetClipboardData(wc.CF_DIB)
+                width, height = struct.unpack_from('<ii', dib, 4)
+                return ClipboardPayload(ClipboardPayload.IMAGE, data=self._dib_to_bmp(dib),
+                                        mime_type='image/bmp', width=width, height=abs(height))
+
+            text = ''
+            if wc.IsClipboardFormatAvailable(wc.CF_UNICODETEXT):
+                text = wc.GetClipboardData(wc.CF_UNICODETEXT) or ''
+
+            if wc.IsClipboardFormatAvailable(self._html_format):
+                html = self._extract_html_fragment(wc.GetClipboardData(self._html_format))
+                if html:
+                    return ClipboardPayload(ClipboardPayload.HTML, text=text,
+                                            data=html.encode('utf-8'), mime_type='text/html')
+
+            if text:
+                return ClipboardPayload(ClipboardPayload.TEXT, text=text)
+            return None
+        except TypeError:
+            return None
+        except Exception as e:
+            print(f"Clipboard access error: {e}")
+            return None
+        finally:
+            try:
+                wc.CloseClipboard()
+            except Exception:
+                pass
+
+    @classmethod
+    def _dib_to_bmp(cls, dib: bytes) -> bytes:
+        """Prefix a CF_DIB bitmap with the file header that makes it a .bmp"""
+        header_size, = struct.unpack_from('<I', dib, 0)
+        bit_count, compression = struct.unpack_from('<HI', dib, 14)
+        colors_used, = struct.unpack_from('<I', dib, 32)
+
+        offset = 14 + header_size
+        if compression == cls.BI_BITFIELDS and header_size == 40:
+            offset += 12
+        if colors_used:
+            offset += colors_used * 4
+        elif bit_count <= 8:
+            offset += (1 << bit_count) * 4
+
+        file_header = struct.pack('<2sIHHI', b'BM', 14 + len(dib), 0, 0, offset)
+        return file_header + dib
+
+    @staticmethod
+    def _extract_html_fragment(raw) -> str:
+        """Cut the fragment out of a CF_HTML payload using its byte offsets"""
+        if isinstance(raw, str):
+            raw = raw.encode('utf-8')
+        header = raw[:512].decode('ascii', errors='ignore')
+        offsets = {}
+        for line in header.splitlines():
+            key, _, value = line.partition(':')
+            if key in ('StartFragment', 'EndFragment') and value.strip().isdigit():
+                offsets[key] = int(value)
+        if len(offsets) == 2:
+            return raw[offsets['StartFragment']:offsets['EndFragment']].decode('utf-8', errors='replace')
+        return raw.decode('utf-8', errors='replace')
+
+
+class FakeClipboardBackend(ClipboardBackend):
+    """Scriptable in-memory clipboard for tests and load runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._payload = None
+        self._sequence = 0
+
+    def set_payload(self, payload: Optional[ClipboardPayload]):
+        with self._lock:
+            self._payload = payload
+            self._sequence += 1
+
+    def set_text(self, text: str):
+        self.set_payload(ClipboardPayload(ClipboardPayload.TEXT, text=text))
+
+    def set_html(self, html: str, text: str = ''):
+        self.set_payload(ClipboardPayload(ClipboardPayload.HTML, text=text,
+                                          data=html.encode('utf-8'), mime_type='text/html'))
+
+    def set_image(self, data: bytes, width: int = 0, height: int = 0, mime_type: str = 'image/png'):
+        self.set_payload(ClipboardPayload(ClipboardPayload.IMAGE, data=data, mime_type=mime_type,
+                                          width=width, height=height))
+
+    def set_files(self, files: List[str]):
+        self.set_payload(ClipboardPayload(ClipboardPayload.FILES, files=files))
+
+    def clear(self):
+        self.set_payload(None)
+
+    def sequence_number(self) -> Optional[int]:
+        with self._lock:
+            return self._sequence
+
+    def read(self) -> Optional[ClipboardPayload]:
+        with self._lock:
+            return self._payload
@@ -1,19 +1,42 @@
 # src/backend/clipboard_service.py
 import sys
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer, QMimeData, QUrl
+from PyQt6.QtGui import QImage
 from typing import Optional
-import win32clipboard
+import itertools
 import threading
 import time
 
+from backend.clipboard_backend import ClipboardBackend, ClipboardPayload, Win32ClipboardBackend
+from backend.pipeline import BoundedQueue, ReorderBuffer, StageMetrics, monotonic_schedule
+
 
 class ClipboardService(QObject):
-    """PyQt-based clipboard monitoring service with polling using win32clipboard"""
+    """
+    PyQt-based clipboard monitoring service polling a pluggable clipboard backend.
+
+    Capture runs as a pipeline so slow work never delays the next clipboard
+    read: the poll thread only reads new payloads into a bounded capture
+    queue, a worker pool categorizes and encrypts them, and a single persist
+    thread deduplicates, stores and emits them in capture order.
+    """
 
     clip_changed = pyqtSignal(str, str)  # content, category
 
-    def __init__(self, categorizer, database, crypto_handler: Optional[object] = None):
+    CAPTURE_QUEUE_SIZE = 64
+    PERSIST_QUEUE_SIZE = 64
+    PERSIST_BATCH_SIZE = 32  # Clips written per transaction when the persist stage falls behind
+    # Trigram and entity indexing is most of the cost of storing a clip; it waits until nothing is
+    # being captured or classified, or under steady load takes a full batch every INDEX_MAX_DELAY seconds
+    INDEX_BATCH_SIZE = 64
+    INDEX_MAX_DELAY = 2.0
+    STAGES = ('capture', 'classify', 'persist', 'end_to_end')
+
+    def __init__(self, categorizer, database, crypto_handler: Optional[object] = None,
+                 backend: Optional[ClipboardBackend] = None, blob_store: Optional[object] = None,
+                 poll_interval: float = 1.0, classify_workers: int = 2,
+                 capture_policy: str = BoundedQueue.DROP_OLDEST):
         super().__init__()
 
         # Ensure a QApplication instance exists
@@ -24,8 +47,11 @@ class ClipboardService(QObject):
         self.categorizer = categorizer
         self.database = database
         self.crypto_handler = crypto_handler
+        self.backend = backend or Win32ClipboardBackend()
+        self.blob_store = blob_store
 
         self.last_clip = ""
+        self._last_sequence = None
 
         # Enabled categories: which types to save automatically
         self.enabled_categories = {
@@ -34,43 +60,87 @@ class ClipboardService(QObject):
             'phone': True,
             'password': True,
             'code': True,
+            'image': True,
+            'html': True,
+            'files': True,
             'text': True
         }
 
+        self.poll_interval = poll_interval
+        self.classify_workers = classify_workers
+        # Full capture queue: drop_oldest keeps the newest copies (the ones users paste next),
+        # drop_newest keeps what was queued first, block stalls the poll thread instead
+        self.capture_policy = capture_policy
+        self.metrics = {name: StageMetrics(name) for name in self.STAGES}
+
         self.monitoring = False
         self._poll_thread = None
-
+        self._worker_threads = []
+        self._persist_thread = None
+        self._capture_queue = None
+        self._persist_queue = None
+        self._reorder = None
+        self._sequence = None
+        self._last_indexed = 0.0
+        self._unindexed = 0
+        self._stop_event = threading.Event()
 
     def check_clipboard(self):
-        """Poll clipboard text content and process new entries"""
-        
-        try:
-            win32clipboard.OpenClipboard()
-            clip = win32clipboard.GetClipboardData(win32clipboard.CF_UNICODETEXT)
-        except TypeError:
-            clip = ''
-        except Exception as e:
-            print(f"Clipboard access error: {e}")
-            clip = ''
-        finally:
-            try:
-                win32clipboard.CloseClipboard()
-            except Exception:
-                pass
+        """Capture stage: read a changed clipboard and hand it to the classify workers"""
+        started = time.monotonic()
 
-        clip = clip.strip() if clip else ""
-        if not clip or clip == self.last_clip or not self.monitoring:
+        # Skip the read entirely while the backend reports an unchanged clipboard
+        sequence = self.backend.sequence_number()
+        if sequence is not None and sequence == self._last_sequence:
             return
+        self._last_sequence = sequence
 
-        self.last_clip = clip
+        payload = self.backend.read()
+        if payload is None or not self.monitoring:
+            return
+
+        fingerprint = payload.fingerprint
+        if fingerprint == self.last_clip:
+            return
 
-        category = self.categorizer.categorize(clip)
+        self.last_clip = fingerprint
+        self.metrics['capture'].record(time.monotonic() - started)
+        self._capture_queue.put({
+            'sequence': next(self._sequence),
+            'payload': payload,
+            'captured_at': started,
+        })
+
+    def process_payload(self, payload: ClipboardPayload):
+        """Categorize, deduplicate, encrypt and store one clipboard payload synchronously"""
+        prepared = self._prepare(payload)
+        if prepared:
+            self._store(prepared)
+
+    def _prepare(self, payload: ClipboardPayload) -> Optional[dict]:
+        """Classify and encrypt a payload; returns None when it should not be stored"""
+        if payload.kind in (ClipboardPayload.TEXT, ClipboardPayload.HTML) and payload.text.strip():
+            clip = payload.text.strip()
+            category = self.categorizer.categorize(clip)
+        else:
+            clip = payload.summary()
+            category = payload.kind
+
+        if not clip:
+            return None
 
         if not self.enabled_categories.get(category, True):
-            return
+            return None
 
-        if self.database.check_duplicate(clip):
-            return
+        # Never keep rich formats of a secret around in plaintext
+        data = payload.data if category != 'password' else None
+
+        blob_hash = None
+        if data is not None and self.blob_store:
+            blob_hash = self.blob_store.put(data)
+
+        if category == ClipboardPayload.IMAGE and blob_hash is None:
+            return None
 
         encrypted_data = None
         clip_to_store = clip
@@ -81,33 +151,174 @@ class ClipboardService(QObject):
             except Exception:
                 clip_to_store = clip
 
+        return {
+            'clip': clip,
+            'content': clip_to_store,
+            'category': category,
+            'encrypted_data': encrypted_data,
+            'blob_hash': blob_hash,
+            'blob_size': len(data) if blob_hash else None,
+            'mime_type': payload.mime_type if blob_hash else None,
+        }
 
-        self.database.add_clip(clip_to_store, category, encrypted_data)
+    def _store(self, prepared: dict):
+        """Persist stage: deduplicate, insert and emit one prepared clip"""
+        category = prepared['category']
+        if category == ClipboardPayload.IMAGE:
+            if self.database.find_clip_by_blob(prepared['blob_hash']):
+                return
+        elif self.database.check_duplicate(prepared['clip'], category):
+            return
+
+        self.database.add_clip(
+            prepared['content'], category, prepared['encrypted_data'],
+            blob_hash=prepared['blob_hash'],
+            blob_size=prepared['blob_size'],
+            mime_type=prepared['mime_type'],
+            defer_indexing=True
+        )
+
+        self.clip_changed.emit(prepared['content'], category)
+
+    def _classify_loop(self):
+        # Keep draining after stop so everything already captured is still stored
+        while not self._stop_event.is_set() or self._capture_queue.qsize():
+            item = self._capture_queue.get()
+            if item is None:
+                continue
+            started = time.monotonic()
+            prepared = None
+            try:
+                prepared = self._prepare(item['payload'])
+                self.metrics['classify'].record(time.monotonic() - started)
+            except Exception as e:
+                self.metrics['classify'].record_error()
+                print(f"Error classifying clip: {e}")
+            # Skipped clips are forwarded too so the persist stage can keep capture order
+            self._persist_queue.put((item['sequence'], item['captured_at'], prepared))
+            self._capture_queue.task_done()
+
+    def _persist_loop(self):
+        while any(worker.is_alive() for worker in self._worker_threads) or self._persist_queue.qsize():
+            entry = self._persist_queue.get()
+            if entry is None:
+                if self._capture_queue.idle():
+                    self._index_deferred()  # Nothing arrived for a moment and nothing is on its way
+                continue
+            # Whatever is already waiting shares one transaction instead of a commit per clip
+            entries = [entry]
+            while len(entries) < self.PERSIST_BATCH_SIZE:
+                entry = self._persist_queue.get(timeout=0)
+                if entry is None:
+                    break
+                entries.append(entry)
+
+            stored = []
+            with self.database.batch():
+                for sequence, captured_at, prepared in entries:
+                    for captured_at, prepared in self._reorder.push(sequence, (captured_at, prepared)):
+                        if prepared is None:
+                            continue
+                        started = time.monotonic()
+                        try:
+                            self._store(prepared)
+                            self.metrics['persist'].record(time.monotonic() - started)
+                            stored.append(captured_at)
+                        except Exception as e:
+                            self.metrics['persist'].record_error()
+                            print(f"Error storing clip: {e}")
+            finished = time.monotonic()
+            for captured_at in stored:
+                self.metrics['end_to_end'].record(finished - captured_at)
+            self._unindexed += len(stored)
+            if self._unindexed >= self.INDEX_BATCH_SIZE and finished - self._last_indexed >= self.INDEX_MAX_DELAY:
+                self._index_deferred()
+
+        # Leave nothing unsearchable behind once capture has stopped
+        while self.database.index_deferred(self.INDEX_BATCH_SIZE):
+            pass
+
+    def _index_deferred(self):
+        self._last_indexed = time.monotonic()
+        try:
+            self._unindexed = max(0, self._unindexed - self.database.index_deferred(self.INDEX_BATCH_SIZE))
+        except Exception as e:
+            print(f"Error indexing clips: {e}")
 
-        self.clip_changed.emit(clip_to_store, category)
-    
     def _poll_loop(self):
-        while self.monitoring:
-            self.check_clipboard()
-            time.sleep(1)
+        for _ in monotonic_schedule(self.poll_interval, self._stop_event):
+            try:
+                self.check_clipboard()
+            except Exception as e:
+                self.metrics['capture'].record_error()
+                print(f"Error reading clipboard: {e}")
 
     def start_monitoring(self):
-        """Start periodic clipboard polling"""
+        """Start periodic clipboard polling and the classify and persist stages"""
         if self.monitoring:
             return
         self.monitoring = True
-        self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self._stop_event.clear()
+        self._sequence = itertools.count(1)
+        self._reorder = ReorderBuffer(first_sequence=1)
+        self._last_indexed = time.monotonic()
+        self._unindexed = 0
+        self._capture_queue = BoundedQueue(
+            self.CAPTURE_QUEUE_SIZE, self.capture_policy, self.metrics['capture'],
+            on_drop=lambda item: self._reorder.skip(item['sequence'])
+        )
+        # Blocking here pushes persist slowness back onto the capture queue, where the policy applies
+        self._persist_queue = BoundedQueue(self.PERSIST_QUEUE_SIZE, BoundedQueue.BLOCK, self.metrics['persist'])
+
+        self._worker_threads = [
+            threading.Thread(target=self._classify_loop, daemon=True, name=f'clip-classify-{i}')
+            for i in range(self.classify_workers)
+        ]
+        for worker in self._worker_threads:
+            worker.start()
+        self._persist_thread = threading.Thread(target=self._persist_loop, daemon=True, name='clip-persist')
+        self._persist_thread.start()
+        self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True, name='clip-capture')
         self._poll_thread.start()
 
     def stop_monitoring(self):
+        """Stop polling, then let the later stages drain what was already captured"""
         self.monitoring = False
-        if self._poll_thread:
-            self._poll_thread.join()
+        self._stop_event.set()
+        for thread in [self._poll_thread, *self._worker_threads, self._persist_thread]:
+            if thread:
+                thread.join()
+
+    def get_pipeline_metrics(self) -> dict:
+        """Per-stage counters, drops, queue depths and latency percentiles (seconds)"""
+        metrics = {name: stage.snapshot() for name, stage in self.metrics.items()}
+        metrics['capture']['queue_depth'] = self._capture_queue.qsize() if self._capture_queue else 0
+        metrics['persist']['queue_depth'] = self._persist_queue.qsize() if self._persist_queue else 0
+        return metrics
 
     def copy_to_clipboard(self, content: str):
         """Copy text content back to system clipboard"""
         self.app.clipboard().setText(content)
 
+    def copy_blob_to_clipboard(self, clip: dict, data: bytes):
+        """Copy an image, HTML or file list clip back to the system clipboard"""
+        if clip['category'] == ClipboardPayload.IMAGE:
+            self.app.clipboard().setImage(QImage.fromData(data))
+            return
+
+        mime_data = QMimeData()
+        if clip.get('mime_type') == 'text/html':
+            mime_data.setHtml(data.decode('utf-8', errors='replace'))
+        mime_data.setText(clip['content'])
+        self.app.clipboard().setMimeData(mime_data)
+
+    def copy_files_to_clipboard(self, paths):
+        """Put a list of file paths back on the clipboard"""
+        mime_data = QMimeData()
+        mime_data.setUrls([QUrl.fromLocalFile(path) for path in paths])
+        mime_data.setText('\n'.join(paths))
+        self.app.clipboard().setMimeData(mime_data)
+
     def set_category_enabled(self, category: str, enabled: bool):
         """Enable or disable storage for a clipboard content category"""
         self.enabled_categories[category] = enabled
@@ -126,24 +337,17 @@ class ClipboardService(QObject):
 
 import threading
 import time
-import win32clipboard
 import logging
 import os
 
 
-from backend.database import ClipboardDatabase
+from backend.database import ClipboardDatabase, get_app_data_path
 from backend.categorizer import ContentCategorizer
-def get_app_data_path():
-    # Get local app data folder for the current user
-    base_dir = os.getenv('LOCALAPPDATA')
-    app_dir = os.path.join(base_dir, "ClipboardOrganizer")
-    os.makedirs(app_dir, exist_ok=True)
-    return os.path.join(app_dir, "clipboard_data.db")
-
 class ClipboardPoller:
-    def __init__(self, categorizer, interval=1.0):
+    def __init__(self, categorizer, interval=1.0, backend: Optional[ClipboardBackend] = None, database=None):
         self.categorizer = categorizer
-        self.database = ClipboardDatabase(get_app_data_path())
+        self.database = database or ClipboardDatabase(get_app_data_path())
+        self.backend = backend or Win32ClipboardBackend()
         self.interval = interval  # seconds
         self.last_clip = None
         self.running = False
@@ -160,17 +364,13 @@ class ClipboardPoller:
 
     def poll_clipboard(self):
         try:
-            win32clipboard.OpenClipboard()
-            clip = win32clipboard.GetClipboardData(win32clipboard.CF_UNICODETEXT)
+            payload = self.backend.read()
+            # The background monitor only keeps text; rich formats are handled by ClipboardService
+            clip = payload.text if payload else None
             logging.debug(f"Read clipboard content length: {len(clip)}") if clip else logging.debug("Clipboard empty or unavailable.")
         except Exception as e:
             logging.error(f"Error reading clipboard: {e}")
             clip = None
-        finally:
-            try:
-                win32clipboard.CloseClipboard()
-            except Exception as close_e:
-                logging.error(f"Error closing clipboard: {close_e}")
 
         clip = clip.strip() if clip else ""
 
@@ -180,7 +380,7 @@ class ClipboardPoller:
             logging.info(f"New clipboard item detected. Category: {category}, Content Preview: {clip[:30]!r}")
 
             try:
-                if self.database.check_duplicate(clip):
+                if self.database.check_duplicate(clip, category):
                     logging.info("Duplicate clip detected, skipping insertion.")
                     full_path = os.path.abspath(self.database.db_path)
                     print(f"Using database file: {full_path}")
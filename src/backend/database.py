@@ -1,107 +1,794 @@
 # src/backend/database.py
 import sqlite3
 import json
+import base64
+import functools
+import heapq
+import threading
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import os
 
+from backend.categorizer import ContentCategorizer
+from backend.dedup import ContentNormalizer, SimHashIndex
+from backend.entities import EntityIndex
+from backend.frecency import FrecencyIndex
+from backend.fuzzy_search import TrigramIndex
+from backend.migrations import MigrationRunner
+from backend.search_cache import SearchCache
+from backend.stats import ClipStats
+
 def get_app_data_path():
-    # Get local app data folder for the current user
-    base_dir = os.getenv('LOCALAPPDATA')
+    # Get local app data folder for the current user; XDG data dir off Windows
+    base_dir = os.getenv('LOCALAPPDATA') or os.getenv('XDG_DATA_HOME') or os.path.join(
+        os.path.expanduser('~'), '.local', 'share')
     app_dir = os.path.join(base_dir, "ClipboardOrganizer")
     os.makedirs(app_dir, exist_ok=True)
     return os.path.join(app_dir, "clipboard_data.db")
+
+
+def synchronized(method):
+    """Serialize use of the shared connection between the UI, poller and job threads"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class ClipboardDatabase:
-    def __init__(self, db_path: str = get_app_data_path()):
-        self.db_path = db_path
+    # How often clips committed by other processes are pulled into the in-memory indexes
+    REFRESH_INTERVAL = 1.0
+
+    def __init__(self, db_path: Optional[str] = None):
+        # Resolved here rather than as a default argument so importing never touches the file system
+        self.db_path = db_path or get_app_data_path()
         self.connection = None
+        self.lock = threading.RLock()
+        self.simhash_index = SimHashIndex()
+        self.frecency_index = FrecencyIndex()
+        self.search_cache = SearchCache()
+        self.trigram_index = None
+        self.entity_index = None
+        self.migrations = None
+        self.device_id = None
+        self._batch_depth = 0
+        self._closed = threading.Event()
         self.init_database()
     
     def init_database(self):
-        """Initialize database with required tables"""
-        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        """Open the database and bring its schema up to date"""
+        # uri=True lets archives be attached read-only through file: URIs
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False, uri=True)
         self.connection.row_factory = sqlite3.Row
-        
+        # WAL lets the UI read while the poller writes, and with synchronous=NORMAL a
+        # commit no longer waits for an fsync (only a checkpoint does)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+
+        self.migrations = MigrationRunner(self.connection, self.lock, {
+            'dedup': self._backfill_dedup_batch,
+            'trigram': self._backfill_trigram_batch,
+            'entities': self._backfill_entity_batch,
+            'uuid': self._backfill_uuid_batch,
+            'stats': self._backfill_stats_batch,
+        })
+        self.migrations.migrate()
+
+        self.trigram_index = TrigramIndex(self.connection)
+        self.entity_index = EntityIndex(self.connection)
+
+        self.device_id = self.get_setting('device_id')
+        if not self.device_id:
+            self.device_id = uuid.uuid4().hex
+            self.set_setting('device_id', self.device_id)
+
+        self._data_version = self.connection.execute('PRAGMA data_version').fetchone()[0]
+        self._indexed_id = self.connection.execute('SELECT COALESCE(MAX(id), 0) FROM clips').fetchone()[0]
+        self._load_simhash_index()
+        self._load_frecency_index()
+        # quick_paste reads the frecency index without the connection; this keeps it current
+        threading.Thread(target=self._refresh_loop, daemon=True, name='db-index-refresh').start()
+
+    @contextmanager
+    def batch(self):
+        """Hold the lock and commit once at the end instead of after every add_clip"""
+        with self.lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self.connection.commit()
+
+    def pending_backfills(self) -> List[str]:
+        """Data migrations still waiting to run after a schema upgrade"""
+        return self.migrations.pending_backfills()
+
+    def run_backfills(self, batch_size: int = 500, job=None) -> int:
+        """Run pending data migrations in small batches; safe to call while capturing"""
+        return self.migrations.run_backfills(batch_size, job)
+
+    # ============= Near-duplicate detection =============
+
+    @staticmethod
+    def _dedup_fields(content: str, category: str) -> Tuple[Optional[str], Optional[int]]:
+        """Return (normalized hash, simhash fingerprint) for content"""
+        if category in ContentNormalizer.OPAQUE_CATEGORIES:
+            return None, None
+        normalized = ContentNormalizer.normalize(content, category)
+        return ContentNormalizer.content_hash(normalized), SimHashIndex.fingerprint(normalized)
+
+    def _load_simhash_index(self):
+        """Build the in-memory SimHash index from stored fingerprints"""
+        self.simhash_index.clear()
+        cursor = self.connection.execute('SELECT id, simhash FROM clips WHERE simhash IS NOT NULL')
+        for row in cursor:
+            self.simhash_index.add(row['id'], SimHashIndex.to_unsigned(row['simhash']))
+
+    @staticmethod
+    def _is_indexable(category: str, is_encrypted: bool) -> bool:
+        """Secrets and opaque payloads never enter the search or entity indexes"""
+        return not (is_encrypted or category == 'password' or category in ContentNormalizer.OPAQUE_CATEGORIES)
+
+    def _index_content(self, cursor, clip_id: int, content: str, category: str, is_encrypted: bool):
+        """Keep the trigram and entity indexes in step with a clip's current content"""
+        if not self._is_indexable(category, is_encrypted):
+            self.trigram_index.remove_clip(cursor, clip_id)
+            self.entity_index.remove_clip(cursor, clip_id)
+        else:
+            self.trigram_index.index_clip(cursor, clip_id, content)
+            self.entity_index.index_clip(cursor, clip_id, ContentCategorizer.extract_entities(content))
+
+    @synchronized
+    def index_deferred(self, limit: int = 64) -> int:
+        """Index up to limit clips stored with defer_indexing; returns how many were indexed"""
         cursor = self.connection.cursor()
-        
-        # Main clips table
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS clips (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                content TEXT NOT NULL,
-                category TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                is_pinned BOOLEAN DEFAULT 0,
-                is_favorite BOOLEAN DEFAULT 0,
-                encrypted_data BLOB,
-                is_encrypted BOOLEAN DEFAULT 0
-            )
-        ''')
-        
-        # Settings table
+            SELECT id, content, category, is_encrypted FROM index_queue JOIN clips ON clips.id = index_queue.clip_id
+            ORDER BY clip_id LIMIT ?
+        ''', (limit,))
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+        for row in rows:
+            self._index_content(cursor, row['id'], row['content'], row['category'], row['is_encrypted'])
+        placeholders = ','.join('?' * len(rows))
+        cursor.execute(f'DELETE FROM index_queue WHERE clip_id IN ({placeholders})', [row['id'] for row in rows])
+        if not self._batch_depth:
+            self.connection.commit()
+        return len(rows)
+
+    # ============= Frecency =============
+
+    # Rows in the shape FrecencyIndex expects; imported clips may have no timestamp
+    FRECENCY_SELECT = '''
+        SELECT id, category, content, is_encrypted, use_count,
+               CAST(strftime('%s', COALESCE(last_used, timestamp)) AS INTEGER) AS used_at
+        FROM clips
+    '''
+
+    def _load_frecency_index(self):
+        """Rank every clip once and keep the best in memory"""
+        capacity = self.frecency_index.capacity
+        scores = self.connection.execute('''
+            SELECT id, use_count, CAST(strftime('%s', COALESCE(last_used, timestamp)) AS INTEGER) AS used_at
+            FROM clips
+        ''').fetchall()
+        top = heapq.nlargest(capacity, scores,
+                             key=lambda row: FrecencyIndex.score(row['use_count'], row['used_at']))
+        rows = []
+        if top:
+            placeholders = ','.join('?' * len(top))
+            rows = self.connection.execute(f'{self.FRECENCY_SELECT} WHERE id IN ({placeholders})',
+                                           [row['id'] for row in top]).fetchall()
+        self.frecency_index.load([dict(row) for row in rows], complete=len(scores) <= capacity)
+
+    def _touch_frecency(self, cursor, clip_id: int):
+        row = cursor.execute(f'{self.FRECENCY_SELECT} WHERE id = ?', (clip_id,)).fetchone()
+        if row:
+            self.frecency_index.touch(dict(row))
+
+    @synchronized
+    def record_use(self, clip_id: int) -> bool:
+        """Count a copy of the clip back to the clipboard; usage stays local and is not synced"""
+        cursor = self.connection.cursor()
+        cursor.execute('UPDATE clips SET use_count = use_count + 1, last_used = CURRENT_TIMESTAMP WHERE id = ?',
+                       (clip_id,))
+        if not cursor.rowcount:
+            return False
+        self.connection.commit()
+        self._touch_frecency(cursor, clip_id)
+        return True
+
+    def quick_paste(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Most frecent clips matching query; answered from memory, not by ranking in SQLite.
+        Only the index's own lock is taken, so a long write never stalls the palette.
+        """
+        return self.frecency_index.search(query, limit)
+
+    def _refresh_loop(self):
+        """Background pickup of other processes' commits; writes from this process update the indexes directly"""
+        while not self._closed.wait(self.REFRESH_INTERVAL):
+            with self.lock:
+                if self._closed.is_set():
+                    break
+                try:
+                    self._refresh_memory_indexes()
+                except sqlite3.Error as e:
+                    print(f"Database error refreshing memory indexes: {e}")
+
+    def _refresh_memory_indexes(self):
+        """
+        Pull clips committed by other processes (the background clipboard monitor)
+        into the in-memory SimHash and frecency indexes. PRAGMA data_version only
+        moves when another connection commits, so this is one pragma otherwise.
+        """
+        data_version = self.connection.execute('PRAGMA data_version').fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+
+        for row in self.connection.execute('SELECT id, simhash FROM clips WHERE id > ? AND simhash IS NOT NULL',
+                                           (self._indexed_id,)).fetchall():
+            self.simhash_index.add(row['id'], SimHashIndex.to_unsigned(row['simhash']))
+        rows = self.connection.execute(f'{self.FRECENCY_SELECT} WHERE id > ? ORDER BY id',
+                                       (self._indexed_id,)).fetchall()
+        for row in rows:
+            self.frecency_index.touch(dict(row))
+        if rows:
+            self._indexed_id = rows[-1]['id']
+
+        # Drop ranked clips another process deleted
+        ranked = self.frecency_index.clip_ids()
+        if ranked:
+            placeholders = ','.join('?' * len(ranked))
+            present = {row['id'] for row in self.connection.execute(
+                f'SELECT id FROM clips WHERE id IN ({placeholders})', ranked)}
+            for clip_id in set(ranked) - present:
+                self.frecency_index.remove(clip_id)
+                self.simhash_index.remove(clip_id)
+            if self.frecency_index.needs_refill():
+                self._load_frecency_index()
+
+    # ============= Backfills (run in batches by MigrationRunner) =============
+
+    def _backfill_dedup_batch(self, cursor, rows):
+        """Compute hashes for clips stored before near-duplicate detection existed"""
+        for row in rows:
+            if row['norm_hash'] is not None or not self._is_indexable(row['category'], row['is_encrypted']):
+                continue
+            norm_hash, fingerprint = self._dedup_fields(row['content'], row['category'])
+            # Clips are visited oldest first, so each one joins the cluster of an older match
+            cluster_id = row['cluster_id'] or self._cluster_for(norm_hash, fingerprint)
+            cursor.execute('UPDATE clips SET norm_hash = ?, simhash = ?, cluster_id = ? WHERE id = ?',
+                           (norm_hash, SimHashIndex.to_signed(fingerprint), cluster_id, row['id']))
+            self.simhash_index.add(row['id'], fingerprint)
+
+    def _backfill_trigram_batch(self, cursor, rows):
+        """Index clips stored before fuzzy search existed"""
+        for row in rows:
+            if self._is_indexable(row['category'], row['is_encrypted']):
+                self.trigram_index.index_clip(cursor, row['id'], row['content'])
+
+    def _backfill_entity_batch(self, cursor, rows):
+        """Extract entities from clips stored before the entity index existed"""
+        for row in rows:
+            if self._is_indexable(row['category'], row['is_encrypted']):
+                self.entity_index.index_clip(cursor, row['id'], ContentCategorizer.extract_entities(row['content']))
+
+    def _backfill_uuid_batch(self, cursor, rows):
+        """Give clips stored before sync existed their uuid"""
+        cursor.executemany('UPDATE clips SET uuid = ? WHERE id = ? AND uuid IS NULL',
+                           [(uuid.uuid4().hex, row['id']) for row in rows if row['uuid'] is None])
+
+    def _backfill_stats_batch(self, cursor, rows):
+        """Count clips stored before the aggregate tables existed"""
+        ClipStats.add_range(cursor, rows[0]['id'], rows[-1]['id'])
+
+    def _cluster_for(self, norm_hash: Optional[str], fingerprint: Optional[int]) -> Optional[int]:
+        """Return the cluster id a new clip with these hashes belongs to, if any"""
+        self._refresh_memory_indexes()
+        match_id = None
+        if norm_hash:
+            row = self.connection.execute(
+                'SELECT id FROM clips WHERE norm_hash = ? ORDER BY id DESC LIMIT 1', (norm_hash,)
+            ).fetchone()
+            if row:
+                match_id = row['id']
+        if match_id is None:
+            match_id = self.simhash_index.find(fingerprint)
+        if match_id is None:
+            return None
+
+        row = self.connection.execute(
+            'SELECT COALESCE(cluster_id, id) AS cluster FROM clips WHERE id = ?', (match_id,)
+        ).fetchone()
+        return row['cluster'] if row else None
+
+    @synchronized
+    def find_near_duplicate(self, content: str, category: str) -> Optional[int]:
+        """Return the id of a stored clip that is a near-duplicate of content"""
+        self._refresh_memory_indexes()
+        norm_hash, fingerprint = self._dedup_fields(content, category)
+        if norm_hash:
+            row = self.connection.execute(
+                'SELECT id FROM clips WHERE norm_hash = ? ORDER BY id DESC LIMIT 1', (norm_hash,)
+            ).fetchone()
+            if row:
+                return row['id']
+        return self.simhash_index.find(fingerprint)
+
+    @synchronized
+    def merge_near_duplicates(self) -> int:
+        """
+        Collapse every near-duplicate cluster into its newest clip.
+        Pin and favorite flags are carried over; returns the number of clips removed.
+        """
+        cursor = self.connection.cursor()
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL
-            )
+            SELECT COALESCE(cluster_id, id) AS cluster, MAX(id) AS keep_id,
+                   MAX(is_pinned) AS pinned, MAX(is_favorite) AS favorite
+            FROM clips
+            GROUP BY cluster
+            HAVING COUNT(*) > 1
         ''')
-        
-        # Create indexes for performance
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON clips(category)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON clips(timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_pinned ON clips(is_pinned)')
-        
+        clusters = cursor.fetchall()
+
+        removed_ids = []
+        for cluster in clusters:
+            cursor.execute('''
+                SELECT id FROM clips WHERE COALESCE(cluster_id, id) = ? AND id != ?
+            ''', (cluster['cluster'], cluster['keep_id']))
+            removed_ids.extend(row['id'] for row in cursor.fetchall())
+            cursor.execute('''
+                UPDATE clips SET is_pinned = ?, is_favorite = ?, cluster_id = NULL WHERE id = ?
+            ''', (cluster['pinned'], cluster['favorite'], cluster['keep_id']))
+            keep_uuid = self._uuid_for(cursor, cluster['keep_id'])
+            self._log_change(cursor, keep_uuid, 'pin', {'is_pinned': cluster['pinned']})
+            self._log_change(cursor, keep_uuid, 'favorite', {'is_favorite': cluster['favorite']})
+
+        self._delete_ids(cursor, removed_ids)
+        self.connection.commit()
+        return len(removed_ids)
+
+    def _delete_ids(self, cursor, clip_ids: List[int], log: bool = True):
+        """Delete clips by id and drop them from the in-memory indexes"""
+        for start in range(0, len(clip_ids), 500):
+            batch = clip_ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            if log:
+                cursor.execute(f'SELECT uuid FROM clips WHERE id IN ({placeholders})', batch)
+                for row in cursor.fetchall():
+                    # A clip still waiting for its uuid was never synced, so peers have nothing to delete
+                    if row['uuid'] is not None:
+                        self._log_change(cursor, row['uuid'], 'delete')
+            cursor.execute(f'DELETE FROM clips WHERE id IN ({placeholders})', batch)
+        for clip_id in clip_ids:
+            self.simhash_index.remove(clip_id)
+            self.frecency_index.remove(clip_id)
+        if self.frecency_index.needs_refill():
+            self._load_frecency_index()
+
+    # ============= Change log =============
+
+    # Fields carried by insert and update change records
+    SNAPSHOT_FIELDS = ('content', 'category', 'timestamp', 'encrypted_data', 'is_encrypted',
+                       'blob_hash', 'blob_size', 'mime_type')
+
+    # Version columns each op stamps; content and every flag resolve conflicts separately
+    VERSION_COLUMNS = {
+        'insert': ('updated_at', 'updated_by'),
+        'update': ('updated_at', 'updated_by'),
+        'pin': ('pinned_at', 'pinned_by'),
+        'favorite': ('favorited_at', 'favorited_by'),
+    }
+
+    @staticmethod
+    def _change_time() -> str:
+        return datetime.utcnow().isoformat(timespec='microseconds')
+
+    def _snapshot(self, cursor, clip_id: int, with_flags: bool = False) -> Dict:
+        """
+        JSON-safe copy of a clip's synced fields.
+        Content is left out: the newest record of a clip always carries its
+        current content, so get_changes_since reads it from the clip instead
+        of the log keeping a second copy of every clip.
+        """
+        cursor.execute('SELECT * FROM clips WHERE id = ?', (clip_id,))
+        row = cursor.fetchone()
+        fields = self.SNAPSHOT_FIELDS + (('is_pinned', 'is_favorite') if with_flags else ())
+        snapshot = {field: row[field] for field in fields if field != 'content'}
+        if row['category'] == 'password' or row['is_encrypted']:
+            # The change log outlives the clip, so a secret only ever travels as ciphertext
+            snapshot['content'] = ''
+        if snapshot['encrypted_data'] is not None:
+            snapshot['encrypted_data'] = base64.b64encode(snapshot['encrypted_data']).decode('ascii')
+        return snapshot
+
+    def _log_change(self, cursor, clip_uuid: str, op: str, payload: Optional[Dict] = None,
+                    changed_at: Optional[str] = None, origin: Optional[str] = None):
+        """Append a change record and stamp the clip with the change's version for what it touches"""
+        changed_at = changed_at or self._change_time()
+        origin = origin or self.device_id
+        if op == 'delete':
+            # Peers that have not seen the clip yet only need to learn that it is gone
+            cursor.execute('''
+                UPDATE changelog SET payload = NULL
+                WHERE clip_uuid = ? AND op IN ('insert', 'update') AND payload IS NOT NULL
+            ''', (clip_uuid,))
+        elif op == 'update':
+            self._supersede_content(cursor, clip_uuid)
+        cursor.execute('''
+            INSERT INTO changelog (clip_uuid, op, payload, changed_at, origin)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (clip_uuid, op, json.dumps(payload) if payload is not None else None, changed_at, origin))
+        if op != 'delete':
+            at, by = self.VERSION_COLUMNS[op]
+            cursor.execute(f'''
+                UPDATE clips SET {at} = ?, {by} = ?
+                WHERE uuid = ? AND ({at} IS NOT ? OR {by} IS NOT ?)
+            ''', (changed_at, origin, clip_uuid, changed_at, origin))
+
+    @staticmethod
+    def _supersede_content(cursor, clip_uuid: str):
+        """Drop the content (and old ciphertext) of earlier records an update replaces"""
+        cursor.execute('''
+            UPDATE changelog SET payload = NULL
+            WHERE clip_uuid = ? AND op = 'update' AND payload IS NOT NULL
+        ''', (clip_uuid,))
+        cursor.execute('''
+            SELECT seq, payload FROM changelog WHERE clip_uuid = ? AND op = 'insert' AND payload IS NOT NULL
+        ''', (clip_uuid,))
+        for row in cursor.fetchall():
+            payload = json.loads(row['payload'])
+            payload.update(content='', encrypted_data=None)
+            cursor.execute('UPDATE changelog SET payload = ? WHERE seq = ?', (json.dumps(payload), row['seq']))
+
+    def _keep_logged_content(self, cursor, clip_ids: List[int]):
+        """Write content into the change records that read it from clips about to leave the hot table"""
+        placeholders = ','.join('?' * len(clip_ids))
+        cursor.execute(f'SELECT uuid, content FROM clips WHERE id IN ({placeholders}) AND uuid IS NOT NULL',
+                       clip_ids)
+        for clip in cursor.fetchall():
+            cursor.execute('''
+                SELECT seq, payload FROM changelog
+                WHERE clip_uuid = ? AND op IN ('insert', 'update') AND payload IS NOT NULL
+            ''', (clip['uuid'],))
+            for row in cursor.fetchall():
+                payload = json.loads(row['payload'])
+                if 'content' not in payload:
+                    payload['content'] = clip['content']
+                    cursor.execute('UPDATE changelog SET payload = ? WHERE seq = ?', (json.dumps(payload), row['seq']))
+
+    @synchronized
+    def compact_changelog(self) -> int:
+        """
+        Drop change records every known peer has applied; returns the number dropped.
+        Delete records stay behind as tombstones so a stale copy cannot bring a clip back.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT MIN(acked_seq) AS seq FROM sync_peers')
+        acked = cursor.fetchone()['seq']
+        if not acked:
+            return 0
+        cursor.execute("DELETE FROM changelog WHERE seq <= ? AND op != 'delete'", (acked,))
+        self.connection.commit()
+        return cursor.rowcount
+
+    @synchronized
+    def get_changes_since(self, seq: int, exclude_origin: Optional[str] = None,
+                          limit: int = 1000) -> Tuple[List[Dict], int]:
+        """
+        Return (changes, last_seq) for change records after seq.
+        last_seq covers filtered records too, so callers can acknowledge it.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT * FROM changelog WHERE seq > ? ORDER BY seq LIMIT ?', (seq, limit))
+        rows = cursor.fetchall()
+        last_seq = rows[-1]['seq'] if rows else seq
+        changes = [dict(row) for row in rows if row['origin'] != exclude_origin]
+        for change in changes:
+            if change['op'] not in ('insert', 'update') or not change['payload']:
+                continue
+            payload = json.loads(change['payload'])
+            if 'content' in payload:
+                continue
+            # Content left out of the log is the clip's current content
+            cursor.execute('SELECT content FROM clips WHERE uuid = ?', (change['clip_uuid'],))
+            clip = cursor.fetchone()
+            if clip:
+                payload['content'] = clip['content']
+                change['payload'] = json.dumps(payload)
+        return changes, last_seq
+
+    @synchronized
+    def get_peer_position(self, peer_id: str) -> int:
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT last_seq FROM sync_peers WHERE peer_id = ?', (peer_id,))
+        row = cursor.fetchone()
+        return row['last_seq'] if row else 0
+
+    @synchronized
+    def set_peer_position(self, peer_id: str, seq: int):
+        """Remember how far this database has applied the peer's change log"""
+        self.connection.execute('''
+            INSERT INTO sync_peers (peer_id, last_seq) VALUES (?, ?)
+            ON CONFLICT(peer_id) DO UPDATE SET last_seq = excluded.last_seq
+        ''', (peer_id, seq))
+        self.connection.commit()
+
+    @synchronized
+    def set_peer_ack(self, peer_id: str, seq: int):
+        """Remember how far the peer has applied this database's change log"""
+        self.connection.execute('''
+            INSERT INTO sync_peers (peer_id, acked_seq) VALUES (?, ?)
+            ON CONFLICT(peer_id) DO UPDATE SET acked_seq = excluded.acked_seq
+        ''', (peer_id, seq))
         self.connection.commit()
+
+    @synchronized
+    def apply_change(self, change: Dict) -> bool:
+        """
+        Apply a change record from another database; returns True if it changed anything.
+
+        Conflicts resolve deterministically: deletes always win, otherwise the
+        record with the greater (changed_at, origin) pair wins. Content, pin and
+        favorite are versioned separately, so a pin never undoes a newer edit
+        made elsewhere, and vice versa.
+        """
+        cursor = self.connection.cursor()
+        clip_uuid, op = change['clip_uuid'], change['op']
+        payload = json.loads(change['payload']) if change.get('payload') else {}
+        version = (change['changed_at'], change['origin'])
+
+        cursor.execute("SELECT 1 FROM changelog WHERE clip_uuid = ? AND op = 'delete' LIMIT 1", (clip_uuid,))
+        if cursor.fetchone():
+            return False
+
+        cursor.execute('SELECT * FROM clips WHERE uuid = ?', (clip_uuid,))
+        row = cursor.fetchone()
+
+        if op == 'delete':
+            if row:
+                self._delete_ids(cursor, [row['id']], log=False)
+            self._log_change(cursor, clip_uuid, op, None, *version)
+            self.connection.commit()
+            return row is not None
+
+        if row is None:
+            if op != 'insert' or not payload:
+                return False  # Clip is archived, was never synced here or is already gone at the source
+            clip = dict(payload, uuid=clip_uuid)
+            if clip.get('encrypted_data'):
+                clip['encrypted_data'] = base64.b64decode(clip['encrypted_data'])
+            self.write_clip(clip, changed_at=version[0], origin=version[1])
+            return True
+
+        at, by = self.VERSION_COLUMNS[op]
+        if version <= (row[at] or '', row[by] or ''):
+            return False
+
+        if op in ('insert', 'update') and 'content' in payload:
+            # An insert's flags are older than any pin or favorite of the clip, so only its content applies
+            encrypted = base64.b64decode(payload['encrypted_data']) if payload.get('encrypted_data') else None
+            self._write_content(cursor, row['id'], row['category'], payload['content'], encrypted)
+        elif op == 'pin':
+            cursor.execute('UPDATE clips SET is_pinned = ? WHERE id = ?', (payload['is_pinned'], row['id']))
+        elif op == 'favorite':
+            cursor.execute('UPDATE clips SET is_favorite = ? WHERE id = ?', (payload['is_favorite'], row['id']))
+        if payload.get('content'):
+            # The clip holds the content now; peers read it back from there
+            payload = {key: value for key, value in payload.items() if key != 'content'}
+        self._log_change(cursor, clip_uuid, op, payload, *version)
+        self.connection.commit()
+        return True
+
+    @staticmethod
+    def _collapsed_source(where: str = '') -> str:
+        """FROM clause keeping only the newest clip of each near-duplicate cluster"""
+        return f'''
+            clips JOIN (
+                SELECT MAX(id) AS keep_id, COUNT(*) AS duplicate_count
+                FROM clips {where}
+                GROUP BY COALESCE(cluster_id, id)
+            ) AS clusters ON clips.id = clusters.keep_id
+        '''
     
-    def add_clip(self, content: str, category: str, encrypted_data: bytes = None) -> int:
-        """Add new clip to database"""
+    @synchronized
+    def add_clip(self, content: str, category: str, encrypted_data: bytes = None,
+                 blob_hash: Optional[str] = None, blob_size: Optional[int] = None,
+                 mime_type: Optional[str] = None, defer_indexing: bool = False) -> int:
+        """
+        Add new clip to database; non-text payloads are referenced by blob hash.
+        With defer_indexing the trigram and entity indexes are left to index_deferred().
+        """
         cursor = self.connection.cursor()
         is_encrypted = encrypted_data is not None
+        norm_hash, fingerprint = (None, None) if is_encrypted else self._dedup_fields(content, category)
+        cluster_id = self._cluster_for(norm_hash, fingerprint)
+        defer_indexing = defer_indexing and self._is_indexable(category, is_encrypted)
+        clip_uuid, changed_at = uuid.uuid4().hex, self._change_time()
         
+        # Stamped with its version up front, so logging the insert does not rewrite the row
         cursor.execute('''
-            INSERT INTO clips (content, category, encrypted_data, is_encrypted)
-            VALUES (?, ?, ?, ?)
-        ''', (content, category, encrypted_data, is_encrypted))
+            INSERT INTO clips (content, category, encrypted_data, is_encrypted, norm_hash, simhash, cluster_id,
+                               blob_hash, blob_size, mime_type, uuid, updated_at, updated_by)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (content, category, encrypted_data, is_encrypted, norm_hash,
+              SimHashIndex.to_signed(fingerprint), cluster_id, blob_hash, blob_size, mime_type,
+              clip_uuid, changed_at, self.device_id))
+        clip_id = cursor.lastrowid
+        if defer_indexing:
+            cursor.execute('INSERT INTO index_queue (clip_id) VALUES (?)', (clip_id,))
+        else:
+            self._index_content(cursor, clip_id, content, category, is_encrypted)
+        self._log_change(cursor, clip_uuid, 'insert', self._snapshot(cursor, clip_id, True), changed_at)
         
-        self.connection.commit()
-        return cursor.lastrowid
+        if not self._batch_depth:
+            self.connection.commit()
+        self.simhash_index.add(clip_id, fingerprint)
+        self._touch_frecency(cursor, clip_id)
+        return clip_id
+
+    @staticmethod
+    def _uuid_for(cursor, clip_id: int) -> str:
+        """The clip's uuid, assigned now if the 'uuid' backfill has not reached it yet"""
+        cursor.execute('SELECT uuid FROM clips WHERE id = ?', (clip_id,))
+        clip_uuid = cursor.fetchone()['uuid']
+        if clip_uuid is None:
+            clip_uuid = uuid.uuid4().hex
+            cursor.execute('UPDATE clips SET uuid = ? WHERE id = ?', (clip_uuid, clip_id))
+        return clip_uuid
     
-    def get_all_clips(self, limit: int = 100) -> List[Dict]:
-        """Retrieve all clips ordered by timestamp"""
+    @synchronized
+    def iter_clip_batches(self, after_id: int = 0, batch_size: int = 500) -> List[Dict]:
+        """Clips with id > after_id in id order; page through the table without holding the lock"""
         cursor = self.connection.cursor()
-        cursor.execute('''
-            SELECT * FROM clips 
-            ORDER BY is_pinned DESC, timestamp DESC 
-            LIMIT ?
-        ''', (limit,))
-        
+        cursor.execute('SELECT * FROM clips WHERE id > ? ORDER BY id LIMIT ?', (after_id, batch_size))
         return [dict(row) for row in cursor.fetchall()]
     
-    def get_clips_by_category(self, category: str, limit: int = 100) -> List[Dict]:
-        """Retrieve clips by category"""
+    @synchronized
+    def get_all_clips(self, limit: int = 100, collapse_duplicates: bool = False, offset: int = 0) -> List[Dict]:
+        """Retrieve clips ordered by timestamp, one page of limit clips starting at offset"""
         cursor = self.connection.cursor()
-        cursor.execute('''
-            SELECT * FROM clips 
-            WHERE category = ?
-            ORDER BY is_pinned DESC, timestamp DESC 
-            LIMIT ?
-        ''', (category, limit))
+        if collapse_duplicates:
+            cursor.execute(f'''
+                SELECT clips.*, clusters.duplicate_count FROM {self._collapsed_source()}
+                ORDER BY is_pinned DESC, timestamp DESC, id DESC
+                LIMIT ? OFFSET ?
+            ''', (limit, offset))
+        else:
+            cursor.execute('''
+                SELECT * FROM clips 
+                ORDER BY is_pinned DESC, timestamp DESC, id DESC
+                LIMIT ? OFFSET ?
+            ''', (limit, offset))
         
         return [dict(row) for row in cursor.fetchall()]
     
-    def search_clips(self, query: str, limit: int = 50) -> List[Dict]:
-        """Search clips by content"""
+    @synchronized
+    def get_clips_by_category(self, category: str, limit: int = 100,
+                              collapse_duplicates: bool = False, offset: int = 0) -> List[Dict]:
+        """Retrieve clips by category, one page of limit clips starting at offset"""
         cursor = self.connection.cursor()
-        cursor.execute('''
-            SELECT * FROM clips 
-            WHERE content LIKE ? 
-            ORDER BY timestamp DESC 
-            LIMIT ?
-        ''', (f'%{query}%', limit))
+        if collapse_duplicates:
+            cursor.execute(f'''
+                SELECT clips.*, clusters.duplicate_count
+                FROM {self._collapsed_source('WHERE category = ?')}
+                ORDER BY is_pinned DESC, timestamp DESC, id DESC
+                LIMIT ? OFFSET ?
+            ''', (category, limit, offset))
+        else:
+            cursor.execute('''
+                SELECT * FROM clips 
+                WHERE category = ?
+                ORDER BY is_pinned DESC, timestamp DESC, id DESC
+                LIMIT ? OFFSET ?
+            ''', (category, limit, offset))
         
         return [dict(row) for row in cursor.fetchall()]
+
+    @synchronized
+    def count_clips(self, category: Optional[str] = None, collapse_duplicates: bool = False) -> int:
+        """Number of clips the matching list would page through"""
+        where, params = ('WHERE category = ?', (category,)) if category else ('', ())
+        column = 'DISTINCT COALESCE(cluster_id, id)' if collapse_duplicates else '*'
+        return self.connection.execute(f'SELECT COUNT({column}) FROM clips {where}', params).fetchone()[0]
     
+    def write_generation(self) -> Tuple[int, int]:
+        """Changes by this connection plus commits by other connections; moves on every write"""
+        return self.connection.total_changes, self.connection.execute('PRAGMA data_version').fetchone()[0]
+
+    @synchronized
+    def search_clips(self, query: str, limit: int = 50, collapse_duplicates: bool = False) -> List[Dict]:
+        """Search clips by content, reusing results computed since the last write"""
+        generation = self.write_generation()
+        options = (collapse_duplicates,)
+        # Duplicate counts depend on the whole match set, so collapsed results are never refined
+        cached = self.search_cache.get(query, limit, options, generation, refine=not collapse_duplicates)
+        if cached is not None:
+            return cached
+
+        cursor = self.connection.cursor()
+        if collapse_duplicates:
+            cursor.execute(f'''
+                SELECT clips.*, clusters.duplicate_count
+                FROM {self._collapsed_source('WHERE content LIKE ?')}
+                ORDER BY timestamp DESC 
+                LIMIT ?
+            ''', (f'%{query}%', limit))
+        else:
+            cursor.execute('''
+                SELECT * FROM clips 
+                WHERE content LIKE ? 
+                ORDER BY timestamp DESC 
+                LIMIT ?
+            ''', (f'%{query}%', limit))
+        
+        results = [dict(row) for row in cursor.fetchall()]
+        self.search_cache.put(query, limit, options, generation, results)
+        return results
+    
+    @synchronized
+    def fuzzy_search_clips(self, query: str, limit: int = 50, min_similarity: float = 0.5) -> List[Dict]:
+        """Typo-tolerant search ranked by trigram similarity"""
+        matches = self.trigram_index.search(query, limit, min_similarity)
+        if not matches:
+            return []
+
+        scores = dict(matches)
+        placeholders = ','.join('?' * len(scores))
+        cursor = self.connection.execute(
+            f'SELECT * FROM clips WHERE id IN ({placeholders})', list(scores)
+        )
+        clips = [dict(row, similarity=round(scores[row['id']], 3)) for row in cursor.fetchall()]
+        clips.sort(key=lambda clip: (clip['similarity'], clip['id']), reverse=True)
+        return clips
+    
+    def _clips_by_ids(self, clip_ids: List[int]) -> List[Dict]:
+        """Fetch clips by id, newest first"""
+        if not clip_ids:
+            return []
+        placeholders = ','.join('?' * len(clip_ids))
+        cursor = self.connection.execute(
+            f'SELECT * FROM clips WHERE id IN ({placeholders}) ORDER BY id DESC', clip_ids
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+    @synchronized
+    def get_clips_by_entity(self, kind: str, value: str, limit: int = 100) -> List[Dict]:
+        """Clips containing a given URL, email or phone number"""
+        value = value.strip()
+        if kind == 'email':
+            value = value.lower()
+        elif kind == 'phone':
+            value = ('+' if value.startswith('+') else '') + ''.join(c for c in value if c.isdigit())
+        return self._clips_by_ids(self.entity_index.clip_ids_for_value(kind, value, limit))
+
+    @synchronized
+    def get_clips_by_domain(self, domain: str, limit: int = 100) -> List[Dict]:
+        """Clips with a URL or email address on the given domain"""
+        domain = ContentCategorizer.normalize_domain(domain.strip())
+        if not domain:
+            return []
+        return self._clips_by_ids(self.entity_index.clip_ids_for_domain(domain, limit))
+
+    @synchronized
+    def get_entities(self, kind: str, limit: int = 100) -> List[Dict]:
+        """Distinct URLs, emails or phone numbers seen in clips"""
+        return self.entity_index.values(kind, limit)
+
+    @synchronized
+    def get_top_domains(self, limit: int = 20) -> List[Dict]:
+        return self.entity_index.top_domains(limit)
+
+    @synchronized
     def toggle_pin(self, clip_id: int) -> bool:
         """Toggle pin status of a clip"""
         cursor = self.connection.cursor()
@@ -111,10 +798,12 @@ class ClipboardDatabase:
         if result:
             new_status = not result['is_pinned']
             cursor.execute('UPDATE clips SET is_pinned = ? WHERE id = ?', (new_status, clip_id))
+            self._log_change(cursor, self._uuid_for(cursor, clip_id), 'pin', {'is_pinned': int(new_status)})
             self.connection.commit()
             return new_status
         return False
     
+    @synchronized
     def toggle_favorite(self, clip_id: int) -> bool:
         """Toggle favorite status of a clip"""
         cursor = self.connection.cursor()
@@ -124,23 +813,63 @@ class ClipboardDatabase:
         if result:
             new_status = not result['is_favorite']
             cursor.execute('UPDATE clips SET is_favorite = ? WHERE id = ?', (new_status, clip_id))
+            self._log_change(cursor, self._uuid_for(cursor, clip_id), 'favorite', {'is_favorite': int(new_status)})
             self.connection.commit()
             return new_status
         return False
     
+    @synchronized
     def delete_clip(self, clip_id: int) -> bool:
         """Delete a clip by ID"""
         cursor = self.connection.cursor()
-        cursor.execute('DELETE FROM clips WHERE id = ?', (clip_id,))
+        cursor.execute('SELECT id FROM clips WHERE id = ?', (clip_id,))
+        if cursor.fetchone() is None:
+            return False
+        self._delete_ids(cursor, [clip_id])
         self.connection.commit()
-        return cursor.rowcount > 0
+        return True
     
-    def check_duplicate(self, content: str) -> bool:
-        """Check if content already exists"""
+    @synchronized
+    def check_duplicate(self, content: str, category: Optional[str] = None) -> bool:
+        """
+        Check if content already exists.
+        When a category is given, clips that only differ after normalization
+        (whitespace, case, tracking parameters...) also count as duplicates.
+        """
         cursor = self.connection.cursor()
         cursor.execute('SELECT id FROM clips WHERE content = ? LIMIT 1', (content,))
+        if cursor.fetchone() is not None:
+            return True
+        if category is None:
+            return False
+
+        norm_hash = ContentNormalizer.content_hash(ContentNormalizer.normalize(content, category))
+        if not norm_hash:
+            return False
+        cursor.execute('SELECT id FROM clips WHERE norm_hash = ? LIMIT 1', (norm_hash,))
         return cursor.fetchone() is not None
     
+    @synchronized
+    def find_clip_by_blob(self, blob_hash: str) -> Optional[int]:
+        """Return the id of a clip referencing the given blob, if any"""
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT id FROM clips WHERE blob_hash = ? LIMIT 1', (blob_hash,))
+        row = cursor.fetchone()
+        return row['id'] if row else None
+
+    @synchronized
+    def get_blob_hashes(self) -> List[str]:
+        """Return every blob hash still referenced by a clip"""
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT DISTINCT blob_hash FROM clips WHERE blob_hash IS NOT NULL')
+        return [row['blob_hash'] for row in cursor.fetchall()]
+    
+    @synchronized
+    def get_stats(self, days: int = 30) -> Dict:
+        """Precomputed clip counts and sizes; only clips the stats backfill has not reached are scanned"""
+        return ClipStats.read(self.connection, days)
+    
+    @synchronized
     def get_setting(self, key: str, default: str = None) -> Optional[str]:
         """Get a setting value"""
         cursor = self.connection.cursor()
@@ -148,6 +877,7 @@ class ClipboardDatabase:
         result = cursor.fetchone()
         return result['value'] if result else default
     
+    @synchronized
     def set_setting(self, key: str, value: str):
         """Set a setting value"""
         cursor = self.connection.cursor()
@@ -157,22 +887,30 @@ class ClipboardDatabase:
         ''', (key, value))
         self.connection.commit()
     
-    def cleanup_old_clips(self, days: int = 30):
-        """Delete clips older than specified days"""
+    @synchronized
+    def cleanup_old_clips(self, days: int = 30, batch_size: int = -1):
+        """Delete clips older than specified days, at most batch_size of them when given"""
         cursor = self.connection.cursor()
         cursor.execute('''
-            DELETE FROM clips 
+            SELECT id FROM clips 
             WHERE datetime(timestamp) < datetime('now', '-' || ? || ' days')
             AND is_pinned = 0
-        ''', (days,))
+            LIMIT ?
+        ''', (days, batch_size))
+        clip_ids = [row['id'] for row in cursor.fetchall()]
+        self._delete_ids(cursor, clip_ids)
         self.connection.commit()
-        return cursor.rowcount
+        return len(clip_ids)
     
+    @synchronized
     def close(self):
         """Close database connection"""
-        if self.connection:
-            self.connection.close()
+        with self.lock:
+            self._closed.set()
+            if self.connection:
+                self.connection.close()
 
+    @synchronized
     def get_clip_by_id(self, clip_id: int) -> Optional[dict]:
         cursor = self.connection.execute("SELECT * FROM clips WHERE id = ?", (clip_id,))
         row = cursor.fetchone()
@@ -181,39 +919,83 @@ class ClipboardDatabase:
             return clip
         return None
     
+    @synchronized
     def update_clip(self, clip_id: int, content: str, encrypted_data: Optional[bytes] = None) -> bool:
         try:
-            self.connection.execute(
-                "UPDATE clips SET content = ?, encrypted_data = ? WHERE id = ?",
-                (content, encrypted_data, clip_id)
-            )
+            row = self.connection.execute("SELECT category FROM clips WHERE id = ?", (clip_id,)).fetchone()
+            if row is None:
+                return False
+            cursor = self.connection.cursor()
+            self._write_content(cursor, clip_id, row['category'], content, encrypted_data)
+            self._log_change(cursor, self._uuid_for(cursor, clip_id), 'update', self._snapshot(cursor, clip_id))
             self.connection.commit()
             return True
         except Exception as e:
             print(f"Database error updating clip: {e}")
             return False
 
-    def write_clip(self, clip: dict) -> int:
+    def _write_content(self, cursor, clip_id: int, category: str, content: str,
+                       encrypted_data: Optional[bytes]):
+        """Replace a clip's content and refresh its dedup and search indexes"""
+        norm_hash, fingerprint = (None, None)
+        if encrypted_data is None:
+            norm_hash, fingerprint = self._dedup_fields(content, category)
+        cursor.execute(
+            "UPDATE clips SET content = ?, encrypted_data = ?, norm_hash = ?, simhash = ? WHERE id = ?",
+            (content, encrypted_data, norm_hash, SimHashIndex.to_signed(fingerprint), clip_id)
+        )
+        self._index_content(cursor, clip_id, content, category, encrypted_data is not None)
+        self.simhash_index.remove(clip_id)
+        self.simhash_index.add(clip_id, fingerprint)
+        self.frecency_index.update_content(clip_id, content, encrypted_data is not None)
+
+    @synchronized
+    def write_clip(self, clip: dict, changed_at: Optional[str] = None, origin: Optional[str] = None) -> int:
         """
         Insert a clip from an imported dictionary.
         Expects keys: content, category, timestamp, is_pinned, is_favorite, encrypted_data, is_encrypted.
-        Missing keys default as appropriate.
+        Missing keys default as appropriate. A clip whose uuid already exists is not
+        inserted again; its existing id is returned instead.
         """
         cursor = self.connection.cursor()
+        clip_uuid = clip.get('uuid') or uuid.uuid4().hex
+        cursor.execute('SELECT id FROM clips WHERE uuid = ?', (clip_uuid,))
+        existing = cursor.fetchone()
+        if existing:
+            return existing['id']
+
+        content = clip.get('content', '')
+        category = clip.get('category', 'text')
+        norm_hash, fingerprint = (None, None)
+        if not clip.get('is_encrypted', 0):
+            norm_hash, fingerprint = self._dedup_fields(content, category)
         cursor.execute('''
             INSERT INTO clips 
-            (content, category, timestamp, is_pinned, is_favorite, encrypted_data, is_encrypted)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            (content, category, timestamp, is_pinned, is_favorite, encrypted_data, is_encrypted,
+             norm_hash, simhash, cluster_id, blob_hash, blob_size, mime_type, uuid)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
-            clip.get('content', ''),
-            clip.get('category', 'text'),
+            content,
+            category,
             clip.get('timestamp', None),  # will use current if None
             clip.get('is_pinned', 0),
             clip.get('is_favorite', 0),
             clip.get('encrypted_data', None),
-            clip.get('is_encrypted', 0)
+            clip.get('is_encrypted', 0),
+            norm_hash,
+            SimHashIndex.to_signed(fingerprint),
+            self._cluster_for(norm_hash, fingerprint),
+            clip.get('blob_hash', None),
+            clip.get('blob_size', None),
+            clip.get('mime_type', None),
+            clip_uuid
         ))
+        clip_id = cursor.lastrowid
+        self._index_content(cursor, clip_id, content, category, bool(clip.get('is_encrypted', 0)))
+        self._log_change(cursor, clip_uuid, 'insert', self._snapshot(cursor, clip_id, True), changed_at, origin)
         self.connection.commit()
-        return cursor.lastrowid
+        self.simhash_index.add(clip_id, fingerprint)
+        self._touch_frecency(cursor, clip_id)
+        return clip_id
 
 
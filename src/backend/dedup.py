@@ -0,0 +1,222 @@
+# src/backend/dedup.py
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+class ContentNormalizer:
+    """Normalize clipboard content per category so near-copies hash the same"""
+
+    WHITESPACE_PATTERN = re.compile(r'\s+')
+    TRAILING_SPACE_PATTERN = re.compile(r'[ \t]+$', re.MULTILINE)
+
+    # Query parameters that only carry tracking information
+    TRACKING_PARAMS = {
+        'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid',
+        'igshid', 'yclid', '_ga', '_gl', 'ref_src', 'si',
+    }
+    TRACKING_PREFIXES = ('utm_',)
+
+    # Categories whose stored text is only a placeholder for a blob
+    OPAQUE_CATEGORIES = {'image'}
+
+    @staticmethod
+    def normalize(content: str, category: str) -> Optional[str]:
+        """
+        Return the normalized form of content for the given category.
+        Returns None for categories that must never be compared (passwords).
+        """
+        if category == 'password' or content is None:
+            return None
+
+        if category == 'url':
+            return ContentNormalizer.normalize_url(content)
+        if category == 'email':
+            return ContentNormalizer.WHITESPACE_PATTERN.sub('', content).lower()
+        if category == 'phone':
+            digits = re.sub(r'[^\d+]', '', content)
+            return digits.lstrip('+')
+        if category == 'code':
+            # Indentation is meaningful in code, trailing whitespace and blank edges are not
+            code = content.replace('\r\n', '\n').replace('\r', '\n')
+            return ContentNormalizer.TRAILING_SPACE_PATTERN.sub('', code).strip('\n')
+
+        # Same as collapsing WHITESPACE_PATTERN runs and stripping, without the regex engine
+        return ' '.join(content.split()).casefold()
+
+    @staticmethod
+    def normalize_url(content: str) -> str:
+        """Lowercase scheme/host, drop fragments, tracking params and trailing slashes"""
+        text = content.strip()
+        try:
+            parts = urlsplit(text)
+        except ValueError:
+            return ContentNormalizer.WHITESPACE_PATTERN.sub(' ', text).casefold()
+
+        if not parts.scheme or not parts.netloc:
+            return ContentNormalizer.WHITESPACE_PATTERN.sub(' ', text).casefold()
+
+        host = parts.netloc.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+
+        query = [
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in ContentNormalizer.TRACKING_PARAMS
+            and not key.lower().startswith(ContentNormalizer.TRACKING_PREFIXES)
+        ]
+        query.sort()
+
+        path = parts.path.rstrip('/')
+        scheme = parts.scheme.lower()
+        if scheme == 'http':
+            scheme = 'https'
+
+        return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+    @staticmethod
+    def content_hash(normalized: Optional[str]) -> Optional[str]:
+        """Stable hash of normalized content, stored alongside each clip"""
+        if normalized is None:
+            return None
+        return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+# SimHash weights are summed in _LANE_BITS-wide counters packed into one integer,
+# one lane per fingerprint bit; _SPREAD_TABLE maps a byte to its eight lanes
+_LANE_BITS = 40
+_SPREAD_TABLE = [sum(((byte >> bit) & 1) << (bit * _LANE_BITS) for bit in range(8)) for byte in range(256)]
+
+
+class SimHashIndex:
+    """
+    In-memory 64-bit SimHash index for near-duplicate lookup.
+
+    Fingerprints are split into bands; by the pigeonhole principle two
+    fingerprints within MAX_DISTANCE bits share at least one identical band,
+    so lookups only inspect clips sharing a band instead of the whole history.
+    """
+
+    BITS = 64
+    BANDS = 6  # MAX_DISTANCE + 1 bands guarantee a shared band for any match
+    MAX_DISTANCE = 5
+    MIN_TOKENS = 8  # Shorter clips are left to the normalized hash
+    TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+    def __init__(self):
+        # Split the 64 bits into BANDS contiguous ranges of (almost) equal width
+        widths = [self.BITS // self.BANDS + (1 if i < self.BITS % self.BANDS else 0)
+                  for i in range(self.BANDS)]
+        self._band_ranges = []
+        offset = 0
+        for width in widths:
+            self._band_ranges.append((offset, (1 << width) - 1))
+            offset += width
+        self._bands: List[Dict[int, Set[int]]] = [dict() for _ in range(self.BANDS)]
+        self._fingerprints: Dict[int, int] = {}
+
+    @staticmethod
+    def fingerprint(normalized: Optional[str]) -> Optional[int]:
+        """Compute the 64-bit SimHash of normalized content from words and word pairs"""
+        if not normalized:
+            return None
+
+        # Count words and word pairs first so repeated features are hashed once;
+        # pairs are counted as tuples and only joined into features once distinct
+        tokens = SimHashIndex.TOKEN_PATTERN.findall(normalized.casefold())
+        if len(tokens) < SimHashIndex.MIN_TOKENS:
+            return None
+        counts = Counter(tokens)
+        for pair, count in Counter(zip(tokens, tokens[1:])).items():
+            counts[' '.join(pair)] += count
+
+        # Count set bits for all 64 positions at once instead of looping bit by bit
+        ones = 0
+        for feature, count in counts.items():
+            value = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            ones += count * SimHashIndex._spread(value)
+
+        # A bit is set when more feature occurrences have it set than not
+        feature_count = sum(counts.values())
+        mask = (1 << _LANE_BITS) - 1
+        result = 0
+        for bit in range(SimHashIndex.BITS):
+            if 2 * (ones >> (bit * _LANE_BITS) & mask) > feature_count:
+                result |= 1 << bit
+        return result
+
+    @staticmethod
+    def _spread(digest: bytes) -> int:
+        """Spread the bits of a big-endian digest into one lane each"""
+        spread = 0
+        for index, byte in enumerate(reversed(digest)):
+            spread |= _SPREAD_TABLE[byte] << (index * 8 * _LANE_BITS)
+        return spread
+
+    @staticmethod
+    def to_signed(value: Optional[int]) -> Optional[int]:
+        """Convert an unsigned fingerprint into SQLite's signed 64-bit range"""
+        if value is None:
+            return None
+        return value - (1 << 64) if value >= 1 << 63 else value
+
+    @staticmethod
+    def to_unsigned(value: Optional[int]) -> Optional[int]:
+        """Convert a fingerprint read from SQLite back to unsigned form"""
+        if value is None:
+            return None
+        return value + (1 << 64) if value < 0 else value
+
+    def _band_keys(self, fingerprint: int) -> Iterable[int]:
+        for offset, mask in self._band_ranges:
+            yield (fingerprint >> offset) & mask
+
+    def add(self, clip_id: int, fingerprint: Optional[int]):
+        """Register a clip fingerprint"""
+        if fingerprint is None:
+            return
+        self.remove(clip_id)
+        self._fingerprints[clip_id] = fingerprint
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            self._bands[band].setdefault(key, set()).add(clip_id)
+
+    def remove(self, clip_id: int):
+        """Forget a clip, if indexed"""
+        fingerprint = self._fingerprints.pop(clip_id, None)
+        if fingerprint is None:
+            return
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            bucket = self._bands[band].get(key)
+            if bucket:
+                bucket.discard(clip_id)
+                if not bucket:
+                    del self._bands[band][key]
+
+    def find(self, fingerprint: Optional[int], exclude: Optional[int] = None) -> Optional[int]:
+        """Return the id of the closest indexed clip within MAX_DISTANCE, if any"""
+        if fingerprint is None:
+            return None
+
+        best_id, best_distance = None, self.MAX_DISTANCE + 1
+        seen = set()
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            for clip_id in self._bands[band].get(key, ()):
+                if clip_id in seen or clip_id == exclude:
+                    continue
+                seen.add(clip_id)
+                distance = bin(self._fingerprints[clip_id] ^ fingerprint).count('1')
+                if distance > self.MAX_DISTANCE:
+                    continue
+                if distance < best_distance or (distance == best_distance and clip_id > best_id):
+                    best_id, best_distance = clip_id, distance
+        return best_id
+
+    def clear(self):
+        for band in self._bands:
+            band.clear()
+        self._fingerprints.clear()
+
+    def __len__(self):
+        return len(self._fingerprints)
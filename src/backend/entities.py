@@ -0,0 +1,91 @@
+# src/backend/entities.py
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class EntityIndex:
+    """
+    Index of the URLs, emails and phone numbers found in clips.
+
+    clip_entities stores one row per (kind, value, clip) with the normalized
+    domain of URLs and emails, so "every email I copied" or "clips mentioning
+    github.com" are index seeks instead of LIKE scans over clip content.
+    """
+
+    KINDS = ('url', 'email', 'phone')
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    def create_schema(cursor):
+        """Create the entity table, its lookup indexes and the cleanup trigger"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS clip_entities (
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                clip_id INTEGER NOT NULL,
+                domain TEXT,
+                PRIMARY KEY (kind, value, clip_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_entity_domain ON clip_entities(domain, clip_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_entity_clip ON clip_entities(clip_id)')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_clip_entities_cleanup AFTER DELETE ON clips
+            BEGIN
+                DELETE FROM clip_entities WHERE clip_id = OLD.id;
+            END
+        ''')
+
+    @staticmethod
+    def index_clip(cursor, clip_id: int, entities: Iterable[Tuple[str, str, Optional[str]]]):
+        """(Re)index a clip's entities; the caller owns the transaction"""
+        cursor.execute('DELETE FROM clip_entities WHERE clip_id = ?', (clip_id,))
+        cursor.executemany(
+            'INSERT OR IGNORE INTO clip_entities (kind, value, clip_id, domain) VALUES (?, ?, ?, ?)',
+            ((kind, value, clip_id, domain) for kind, value, domain in entities)
+        )
+
+    @staticmethod
+    def remove_clip(cursor, clip_id: int):
+        cursor.execute('DELETE FROM clip_entities WHERE clip_id = ?', (clip_id,))
+
+    def clip_ids_for_value(self, kind: str, value: str, limit: int = 100) -> List[int]:
+        """Newest clips containing exactly this entity"""
+        return [row[0] for row in self.connection.execute('''
+            SELECT clip_id FROM clip_entities
+            WHERE kind = ? AND value = ?
+            ORDER BY clip_id DESC LIMIT ?
+        ''', (kind, value, limit))]
+
+    def clip_ids_for_domain(self, domain: str, limit: int = 100) -> List[int]:
+        """Newest clips with a URL or email on this exact (normalized) domain"""
+        return [row[0] for row in self.connection.execute('''
+            SELECT DISTINCT clip_id FROM clip_entities
+            WHERE domain = ?
+            ORDER BY clip_id DESC LIMIT ?
+        ''', (domain, limit))]
+
+    def values(self, kind: str, limit: int = 100) -> List[Dict]:
+        """Distinct values of one kind with how many clips contain them, most recent first"""
+        return [
+            {'value': row[0], 'domain': row[1], 'clip_count': row[2], 'last_clip_id': row[3]}
+            for row in self.connection.execute('''
+                SELECT value, domain, COUNT(*), MAX(clip_id) FROM clip_entities
+                WHERE kind = ?
+                GROUP BY value
+                ORDER BY MAX(clip_id) DESC LIMIT ?
+            ''', (kind, limit))
+        ]
+
+    def top_domains(self, limit: int = 20) -> List[Dict]:
+        """Domains referenced by the most clips"""
+        return [
+            {'domain': row[0], 'clip_count': row[1]}
+            for row in self.connection.execute('''
+                SELECT domain, COUNT(DISTINCT clip_id) AS clip_count FROM clip_entities
+                WHERE domain IS NOT NULL
+                GROUP BY domain
+                ORDER BY clip_count DESC, domain LIMIT ?
+            ''', (limit,))
+        ]
@@ -0,0 +1,109 @@
+# src/backend/frecency.py
+import bisect
+import math
+import threading
+from typing import Dict, List, Optional
+
+
+class FrecencyIndex:
+    """
+    In-memory top-N of clips ranked by frecency, for the quick-paste palette.
+
+    A clip's score is log2(1 + uses) + last_used / HALF_LIFE. Every clip
+    decays at the same rate, so instead of aging all scores over time the
+    decay is folded into the absolute timestamp: a score only changes when
+    its own clip is used, and keeping the top N current is a single sorted
+    insert per copy or new clip. Doubling the use count is worth the same
+    as being used HALF_LIFE seconds more recently.
+    """
+
+    HALF_LIFE = 3 * 24 * 3600.0
+    PREVIEW_CHARS = 500
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._entries: Dict[int, Dict] = {}
+        self._ranked: List[tuple] = []  # (score, clip_id), ascending
+        self._lock = threading.Lock()
+        # True while the index holds every clip, so deletions never leave it short
+        self.complete = True
+
+    @classmethod
+    def score(cls, use_count: int, used_at: Optional[float]) -> float:
+        return math.log2(1 + (use_count or 0)) + (used_at or 0) / cls.HALF_LIFE
+
+    def load(self, rows: List[Dict], complete: bool):
+        """Replace the index with rows already chosen as the top clips"""
+        with self._lock:
+            self._entries.clear()
+            self._ranked = []
+            for row in rows:
+                self._insert(row)
+            self.complete = complete
+
+    def touch(self, row: Dict):
+        """Record an insert or use; row carries id, category, content, is_encrypted, use_count and used_at"""
+        with self._lock:
+            self._remove(row['id'])
+            self._insert(row)
+            while len(self._ranked) > self.capacity:
+                _, clip_id = self._ranked.pop(0)
+                del self._entries[clip_id]
+                self.complete = False
+
+    def update_content(self, clip_id: int, content: str, is_encrypted: bool):
+        with self._lock:
+            entry = self._entries.get(clip_id)
+            if entry is not None:
+                entry.update(self._text_fields(content, entry['category'], is_encrypted))
+
+    def remove(self, clip_id: int):
+        with self._lock:
+            self._remove(clip_id)
+
+    def clip_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._entries)
+
+    def needs_refill(self) -> bool:
+        """Whether deletions have shrunk the index enough that clips outside it could rank"""
+        return not self.complete and len(self._entries) < self.capacity // 2
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Best-ranked clips containing every word of query (case-insensitive)"""
+        terms = query.casefold().split()
+        results = []
+        with self._lock:
+            for _, clip_id in reversed(self._ranked):
+                entry = self._entries[clip_id]
+                if all(term in entry['folded'] for term in terms):
+                    results.append({key: entry[key] for key in ('id', 'category', 'preview', 'use_count')})
+                    if len(results) >= limit:
+                        break
+        return results
+
+    def _text_fields(self, content: str, category: str, is_encrypted: bool) -> Dict:
+        # Secrets are listed without their text and never matched, as in the search indexes
+        if is_encrypted or category == 'password':
+            return {'preview': '', 'folded': ''}
+        preview = (content or '')[:self.PREVIEW_CHARS]
+        return {'preview': preview, 'folded': preview.casefold()}
+
+    def _insert(self, row: Dict):
+        """Add a row; caller holds the lock"""
+        score = self.score(row['use_count'], row['used_at'])
+        entry = {'id': row['id'], 'category': row['category'], 'use_count': row['use_count'] or 0,
+                 'score': score}
+        entry.update(self._text_fields(row['content'], row['category'], row['is_encrypted']))
+        self._entries[row['id']] = entry
+        bisect.insort(self._ranked, (score, row['id']))
+
+    def _remove(self, clip_id: int):
+        """Drop a clip if present; caller holds the lock"""
+        entry = self._entries.pop(clip_id, None)
+        if entry is not None:
+            index = bisect.bisect_left(self._ranked, (entry['score'], clip_id))
+            del self._ranked[index]
+
+    def __len__(self):
+        return len(self._entries)
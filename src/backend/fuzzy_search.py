@@ -0,0 +1,147 @@
+# src/backend/fuzzy_search.py
+import math
+import re
+from typing import Dict, List, Set, Tuple
+
+
+class TrigramIndex:
+    """
+    Typo-tolerant search over clip content backed by a trigram table.
+
+    Every clip is split into character trigrams stored in clip_trigrams,
+    with per-trigram document frequencies kept in trigram_df by triggers.
+    A query needing T of its Q trigrams to match can only hit clips that
+    contain one of its Q - T + 1 rarest trigrams, so candidates come from
+    the shortest posting lists and the whole history is never scanned.
+    """
+
+    MAX_INDEXED_CHARS = 4096  # Only the head of huge clips is indexed
+    MAX_QUERY_TRIGRAMS = 64
+    MAX_CANDIDATES = 2000
+    SQL_BATCH = 500
+
+    NON_WORD_PATTERN = re.compile(r'[\W_]+', re.UNICODE)
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    def create_schema(cursor):
+        """Create trigram tables and the triggers that keep frequencies current"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS clip_trigrams (
+                trigram TEXT NOT NULL,
+                clip_id INTEGER NOT NULL,
+                PRIMARY KEY (trigram, clip_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trigram_clip ON clip_trigrams(clip_id)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trigram_df (
+                trigram TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_trigram_df_insert AFTER INSERT ON clip_trigrams
+            BEGIN
+                INSERT OR IGNORE INTO trigram_df (trigram, df) VALUES (NEW.trigram, 0);
+                UPDATE trigram_df SET df = df + 1 WHERE trigram = NEW.trigram;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_trigram_df_delete AFTER DELETE ON clip_trigrams
+            BEGIN
+                UPDATE trigram_df SET df = df - 1 WHERE trigram = OLD.trigram;
+                DELETE FROM trigram_df WHERE trigram = OLD.trigram AND df <= 0;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_clip_trigrams_cleanup AFTER DELETE ON clips
+            BEGIN
+                DELETE FROM clip_trigrams WHERE clip_id = OLD.id;
+            END
+        ''')
+
+    @staticmethod
+    def drop_empty_frequencies(cursor):
+        """Recreate the delete trigger so it drops trigrams no clip has left, and purge existing ones"""
+        cursor.execute('DROP TRIGGER IF EXISTS trg_trigram_df_delete')
+        TrigramIndex.create_schema(cursor)
+        cursor.execute('DELETE FROM trigram_df WHERE df <= 0')
+
+    @staticmethod
+    def trigrams(text: str) -> Set[str]:
+        """Return the set of padded lowercase trigrams of text"""
+        if not text:
+            return set()
+        words = TrigramIndex.NON_WORD_PATTERN.sub(' ', text.casefold()).split()
+        result = set()
+        for word in words:
+            padded = f'  {word} '
+            for i in range(len(padded) - 2):
+                result.add(padded[i:i + 3])
+        return result
+
+    def index_clip(self, cursor, clip_id: int, content: str):
+        """(Re)index a clip; the caller owns the transaction"""
+        cursor.execute('DELETE FROM clip_trigrams WHERE clip_id = ?', (clip_id,))
+        grams = self.trigrams((content or '')[:self.MAX_INDEXED_CHARS])
+        cursor.executemany(
+            'INSERT OR IGNORE INTO clip_trigrams (trigram, clip_id) VALUES (?, ?)',
+            ((gram, clip_id) for gram in grams)
+        )
+
+    def remove_clip(self, cursor, clip_id: int):
+        cursor.execute('DELETE FROM clip_trigrams WHERE clip_id = ?', (clip_id,))
+
+    def search(self, query: str, limit: int = 50, min_similarity: float = 0.5) -> List[Tuple[int, float]]:
+        """
+        Return (clip_id, similarity) pairs ranked by similarity, best first.
+        Similarity is the share of the query's trigrams found in the clip.
+        """
+        grams = sorted(self.trigrams(query))[:self.MAX_QUERY_TRIGRAMS]
+        if not grams:
+            return []
+
+        required = max(1, math.ceil(min_similarity * len(grams)))
+
+        # Rarest trigrams first; a match must contain at least one of the first Q - T + 1
+        frequencies = self._document_frequencies(grams)
+        grams.sort(key=lambda gram: frequencies.get(gram, 0))
+        probe = [gram for gram in grams[:len(grams) - required + 1] if frequencies.get(gram, 0) > 0]
+        if not probe:
+            return []
+
+        # Clips sharing the most probe trigrams are kept when there are too many candidates
+        placeholders = ','.join('?' * len(probe))
+        candidates = [row[0] for row in self.connection.execute(f'''
+            SELECT clip_id FROM clip_trigrams
+            WHERE trigram IN ({placeholders})
+            GROUP BY clip_id
+            ORDER BY COUNT(*) DESC, clip_id DESC
+            LIMIT ?
+        ''', (*probe, self.MAX_CANDIDATES))]
+
+        gram_placeholders = ','.join('?' * len(grams))
+        scored = []
+        for start in range(0, len(candidates), self.SQL_BATCH):
+            batch = candidates[start:start + self.SQL_BATCH]
+            clip_placeholders = ','.join('?' * len(batch))
+            for clip_id, shared in self.connection.execute(f'''
+                SELECT clip_id, COUNT(*) FROM clip_trigrams
+                WHERE trigram IN ({gram_placeholders}) AND clip_id IN ({clip_placeholders})
+                GROUP BY clip_id
+            ''', (*grams, *batch)):
+                if shared >= required:
+                    scored.append((clip_id, shared / len(grams)))
+
+        scored.sort(key=lambda item: (item[1], item[0]), reverse=True)
+        return scored[:limit]
+
+    def _document_frequencies(self, grams: List[str]) -> Dict[str, int]:
+        placeholders = ','.join('?' * len(grams))
+        cursor = self.connection.execute(
+            f'SELECT trigram, df FROM trigram_df WHERE trigram IN ({placeholders})', grams
+        )
+        return {row[0]: row[1] for row in cursor}
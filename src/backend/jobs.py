@@ -0,0 +1,199 @@
+# src/backend/jobs.py
+import itertools
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when its job has been cancelled"""
+
+
+class Job:
+    """State of one background operation, shared between worker and pollers"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+    def __init__(self, job_id: str, job_type: str):
+        self.id = job_id
+        self.type = job_type
+        self.status = self.QUEUED
+        self.done = 0
+        self.total = None
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def report(self, done: int, total: Optional[int] = None, message: Optional[str] = None):
+        """Record progress; also the natural point to notice cancellation"""
+        self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def to_dict(self) -> Dict:
+        progress = None
+        if self.total:
+            progress = min(1.0, self.done / self.total)
+        elif self.status == self.COMPLETED:
+            progress = 1.0
+        return {
+            'id': self.id,
+            'type': self.type,
+            'status': self.status,
+            'done': self.done,
+            'total': self.total,
+            'progress': progress,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Runs long operations on a bounded worker pool.
+
+    submit() returns a job id immediately. Each job type has its own
+    concurrency cap; jobs over the cap wait in a per-type queue without
+    occupying a worker. Job functions receive the Job as their first
+    argument and should call job.report() between units of work so progress
+    is visible and cancellation takes effect.
+    """
+
+    DEFAULT_TYPE_LIMIT = 1
+
+    def __init__(self, max_workers: int = 3, type_limits: Optional[Dict[str, int]] = None,
+                 history_size: int = 100):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._type_limits = dict(type_limits or {})
+        self._history_size = history_size
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._running = defaultdict(int)
+        self._waiting = defaultdict(deque)
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback: Callable[[Dict], None]):
+        """Register a callback receiving job dicts on every status change (push updates)"""
+        self._listeners.append(callback)
+
+    def submit(self, job_type: str, func: Callable, *args, **kwargs) -> str:
+        """Queue func(job, *args, **kwargs) and return the new job id"""
+        with self._lock:
+            job = Job(f'{job_type}-{next(self._ids)}', job_type)
+            self._jobs[job.id] = job
+            self._prune()
+            entry = (job, func, args, kwargs)
+            if self._running[job_type] < self._type_limits.get(job_type, self.DEFAULT_TYPE_LIMIT):
+                self._start(entry)
+            else:
+                self._waiting[job_type].append(entry)
+        self._notify(job)
+        return job.id
+
+    def _start(self, entry):
+        """Hand a job to the pool; caller holds the lock"""
+        job = entry[0]
+        self._running[job.type] += 1
+        self._executor.submit(self._run, *entry)
+
+    def _run(self, job: Job, func: Callable, args, kwargs):
+        try:
+            if job.cancelled:
+                raise JobCancelled()
+            job.status = Job.RUNNING
+            job.started_at = time.time()
+            self._notify(job)
+            job.result = func(job, *args, **kwargs)
+            job.status = Job.COMPLETED
+        except JobCancelled:
+            job.status = Job.CANCELLED
+        except Exception as e:
+            job.status = Job.FAILED
+            job.error = str(e)
+            print(f"Job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._running[job.type] -= 1
+                waiting = self._waiting[job.type]
+                while waiting:
+                    entry = waiting.popleft()
+                    if entry[0].cancelled:
+                        continue
+                    self._start(entry)
+                    break
+            self._notify(job)
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation; queued jobs never start, running jobs stop at their next report()"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.status in Job.FINISHED:
+                return False
+            job._cancel_event.set()
+            waiting = self._waiting[job.type]
+            for entry in list(waiting):
+                if entry[0] is job:
+                    waiting.remove(entry)
+                    job.status = Job.CANCELLED
+                    job.finished_at = time.time()
+        self._notify(job)
+        return True
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond history_size; caller holds the lock"""
+        excess = len(self._jobs) - self._history_size
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.status in Job.FINISHED]:
+            if excess <= 0:
+                break
+            del self._jobs[job_id]
+            excess -= 1
+
+    def _notify(self, job: Job):
+        for callback in self._listeners:
+            try:
+                callback(job.to_dict())
+            except Exception as e:
+                print(f"Job listener error: {e}")
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._jobs.values():
+                job._cancel_event.set()
+        self._executor.shutdown(wait=False)
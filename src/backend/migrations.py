@@ -0,0 +1,275 @@
+# src/backend/migrations.py
+from contextlib import contextmanager
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from backend.entities import EntityIndex
+from backend.fuzzy_search import TrigramIndex
+from backend.stats import ClipStats
+
+
+class Migration(NamedTuple):
+    """One schema step; backfill names a batched data migration it schedules"""
+    version: int
+    description: str
+    apply: Callable
+    backfill: Optional[str] = None
+
+
+def ensure_column(cursor, table: str, column: str, definition: str):
+    """Add a column unless a database created by a development build already has it"""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _base_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS clips (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content TEXT NOT NULL,
+            category TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            is_pinned BOOLEAN DEFAULT 0,
+            is_favorite BOOLEAN DEFAULT 0,
+            encrypted_data BLOB,
+            is_encrypted BOOLEAN DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON clips(category)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON clips(timestamp)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pinned ON clips(is_pinned)')
+
+
+def _dedup_columns(cursor):
+    ensure_column(cursor, 'clips', 'norm_hash', 'TEXT')
+    ensure_column(cursor, 'clips', 'simhash', 'INTEGER')
+    ensure_column(cursor, 'clips', 'cluster_id', 'INTEGER')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_norm_hash ON clips(norm_hash)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_cluster ON clips(cluster_id)')
+
+
+def _blob_columns(cursor):
+    ensure_column(cursor, 'clips', 'blob_hash', 'TEXT')
+    ensure_column(cursor, 'clips', 'blob_size', 'INTEGER')
+    ensure_column(cursor, 'clips', 'mime_type', 'TEXT')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_blob_hash ON clips(blob_hash)')
+
+
+def _sync_tables(cursor):
+    ensure_column(cursor, 'clips', 'uuid', 'TEXT')
+    ensure_column(cursor, 'clips', 'updated_at', 'TEXT')
+    ensure_column(cursor, 'clips', 'updated_by', 'TEXT')
+    # NULLs never collide in a unique index; existing clips get their uuid from the 'uuid' backfill
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_uuid ON clips(uuid)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS changelog (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            clip_uuid TEXT NOT NULL,
+            op TEXT NOT NULL,
+            payload TEXT,
+            changed_at TEXT NOT NULL,
+            origin TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_changelog_uuid ON changelog(clip_uuid, op)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            peer_id TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+
+def _archive_catalog(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archives (
+            month TEXT PRIMARY KEY,
+            clip_count INTEGER NOT NULL DEFAULT 0,
+            min_id INTEGER,
+            max_id INTEGER
+        )
+    ''')
+
+
+def _usage_columns(cursor):
+    ensure_column(cursor, 'clips', 'use_count', 'INTEGER NOT NULL DEFAULT 0')
+    ensure_column(cursor, 'clips', 'last_used', 'DATETIME')
+
+
+def _changelog_acks(cursor):
+    ensure_column(cursor, 'sync_peers', 'acked_seq', 'INTEGER NOT NULL DEFAULT 0')
+    # Older change logs kept the payloads of deleted clips and the plaintext of secrets
+    cursor.execute('''
+        UPDATE changelog SET payload = NULL
+        WHERE op IN ('insert', 'update') AND payload IS NOT NULL
+        AND clip_uuid IN (
+            SELECT clip_uuid FROM changelog WHERE op = 'delete'
+            UNION ALL
+            SELECT uuid FROM clips WHERE (category = 'password' OR is_encrypted) AND uuid IS NOT NULL
+        )
+    ''')
+
+
+def _list_order_indexes(cursor):
+    # Match the clip list's ORDER BY so a page is read straight off an index instead of sorting every clip
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_list_order ON clips(is_pinned, timestamp)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_category_list_order ON clips(category, is_pinned, timestamp)')
+
+
+def _deferred_index_column(cursor):
+    ensure_column(cursor, 'clips', 'index_pending', 'INTEGER NOT NULL DEFAULT 0')
+    # Partial, so it only ever holds the few clips captured since the last indexing pass
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_index_pending ON clips(id) WHERE index_pending')
+
+
+def _deferred_index_queue(cursor):
+    # A side table rather than the index_pending flag, so clearing it never rewrites a (possibly huge) clip row
+    cursor.execute('CREATE TABLE IF NOT EXISTS index_queue (clip_id INTEGER PRIMARY KEY)')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_index_queue_cleanup AFTER DELETE ON clips
+        BEGIN
+            DELETE FROM index_queue WHERE clip_id = OLD.id;
+        END
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO index_queue (clip_id) SELECT id FROM clips WHERE index_pending')
+    cursor.execute('UPDATE clips SET index_pending = 0 WHERE index_pending')
+    cursor.execute('DROP INDEX IF EXISTS idx_index_pending')
+
+
+def _flag_versions(cursor):
+    # Pin and favorite carry their own (changed_at, origin) versions, so toggling one never outranks a content edit
+    for flag in ('pinned', 'favorited'):
+        ensure_column(cursor, 'clips', f'{flag}_at', 'TEXT')
+        ensure_column(cursor, 'clips', f'{flag}_by', 'TEXT')
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'base tables', _base_tables),
+    Migration(2, 'near-duplicate hashes', _dedup_columns, backfill='dedup'),
+    Migration(3, 'trigram index', TrigramIndex.create_schema, backfill='trigram'),
+    Migration(4, 'blob references', _blob_columns),
+    Migration(5, 'sync change log', _sync_tables, backfill='uuid'),
+    Migration(6, 'aggregate stats', ClipStats.create_schema, backfill='stats'),
+    Migration(7, 'entity index', EntityIndex.create_schema, backfill='entities'),
+    Migration(8, 'archive catalog', _archive_catalog),
+    Migration(9, 'clip usage', _usage_columns),
+    Migration(10, 'change log acknowledgements', _changelog_acks),
+    Migration(11, 'clip list order', _list_order_indexes),
+    Migration(12, 'deferred search indexing', _deferred_index_column),
+    Migration(13, 'deferred search index queue', _deferred_index_queue),
+    Migration(14, 'flag sync versions', _flag_versions),
+    Migration(15, 'drop unused trigram frequencies', TrigramIndex.drop_empty_frequencies),
+]
+
+
+class MigrationRunner:
+    """
+    Upgrades a database to the latest schema version (PRAGMA user_version).
+
+    Schema steps are small and run at startup, each in its own transaction
+    together with the version bump, so an interrupted upgrade resumes at the
+    failed step. Data migrations are registered by the step that needs them
+    and run later in batches by run_backfills(); their position is kept in
+    settings under 'backfill:<name>', so they survive restarts and only hold
+    the database lock for one batch at a time.
+    """
+
+    BACKFILL_PREFIX = 'backfill:'
+
+    def __init__(self, connection, lock, backfills: Dict[str, Callable],
+                 migrations: Optional[List[Migration]] = None):
+        self.connection = connection
+        self.lock = lock
+        self.backfills = backfills
+        self.migrations = migrations if migrations is not None else MIGRATIONS
+
+    @contextmanager
+    def _transaction(self):
+        if self.connection.in_transaction:
+            self.connection.commit()
+        cursor = self.connection.cursor()
+        cursor.execute('BEGIN')
+        try:
+            yield cursor
+        except Exception:
+            self.connection.rollback()
+            raise
+        self.connection.commit()
+
+    @property
+    def version(self) -> int:
+        return self.connection.execute('PRAGMA user_version').fetchone()[0]
+
+    @property
+    def latest_version(self) -> int:
+        return max((step.version for step in self.migrations), default=0)
+
+    def migrate(self) -> int:
+        """Apply every pending schema step; returns the number applied"""
+        applied = 0
+        with self.lock:
+            for step in sorted(self.migrations, key=lambda step: step.version):
+                if step.version <= self.version:
+                    continue
+                with self._transaction() as cursor:
+                    step.apply(cursor)
+                    # Clips stored from now on are handled as they are written, so an empty table needs no backfill
+                    if step.backfill and cursor.execute('SELECT EXISTS (SELECT 1 FROM clips)').fetchone()[0]:
+                        cursor.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+                                       (self.BACKFILL_PREFIX + step.backfill, '0'))
+                    # user_version is stored in the header and is part of the transaction
+                    cursor.execute(f'PRAGMA user_version = {int(step.version)}')
+                applied += 1
+        return applied
+
+    def pending_backfills(self) -> List[str]:
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT key FROM settings WHERE key LIKE ? ORDER BY key', (self.BACKFILL_PREFIX + '%',)
+            ).fetchall()
+        return [row[0][len(self.BACKFILL_PREFIX):] for row in rows]
+
+    def run_backfills(self, batch_size: int = 500, job=None) -> int:
+        """Run pending data migrations to completion; returns rows processed"""
+        processed = 0
+        for name in self.pending_backfills():
+            with self.lock:
+                position = int(self.connection.execute(
+                    'SELECT value FROM settings WHERE key = ?', (self.BACKFILL_PREFIX + name,)
+                ).fetchone()[0])
+                remaining = self.connection.execute(
+                    'SELECT COUNT(*) FROM clips WHERE id > ?', (position,)
+                ).fetchone()[0]
+            done = 0
+            while True:
+                count = self._run_batch(name, batch_size)
+                if not count:
+                    break
+                done += count
+                if job:
+                    job.report(done, remaining, message=f'Upgrading {name} ({done}/{remaining})')
+            processed += done
+        return processed
+
+    def _run_batch(self, name: str, batch_size: int) -> int:
+        """Process one batch of clips past the saved position; the last empty batch completes it"""
+        key = self.BACKFILL_PREFIX + name
+        with self.lock, self._transaction() as cursor:
+            row = cursor.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return 0
+            rows = cursor.execute(
+                'SELECT * FROM clips WHERE id > ? ORDER BY id LIMIT ?', (int(row[0]), batch_size)
+            ).fetchall()
+            if not rows:
+                cursor.execute('DELETE FROM settings WHERE key = ?', (key,))
+                return 0
+            self.backfills[name](cursor, rows)
+            cursor.execute('UPDATE settings SET value = ? WHERE key = ?', (str(rows[-1]['id']), key))
+            return len(rows)
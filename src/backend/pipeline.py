@@ -0,0 +1,171 @@
+# src/backend/pipeline.py
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+
+class StageMetrics:
+    """Counters and latency samples for one pipeline stage"""
+
+    SAMPLE_SIZE = 1000
+
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self._latencies = deque(maxlen=self.SAMPLE_SIZE)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self.processed += 1
+            self._latencies.append(latency)
+
+    def record_drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_depth(self, depth: int):
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    @staticmethod
+    def _percentile(samples, fraction: float) -> Optional[float]:
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            samples = sorted(self._latencies)
+            return {
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'max_queue_depth': self.max_queue_depth,
+                'latency_p50': self._percentile(samples, 0.50),
+                'latency_p95': self._percentile(samples, 0.95),
+                'latency_p99': self._percentile(samples, 0.99),
+                'latency_max': samples[-1] if samples else None,
+            }
+
+
+class BoundedQueue:
+    """
+    queue.Queue with an explicit policy for when it is full.
+
+    'block' waits for space (pushing backpressure to the producer),
+    'drop_newest' rejects the incoming item and 'drop_oldest' evicts the
+    head to make room. Dropped items are passed to on_drop.
+    """
+
+    BLOCK = 'block'
+    DROP_NEWEST = 'drop_newest'
+    DROP_OLDEST = 'drop_oldest'
+
+    def __init__(self, maxsize: int, policy: str, metrics: StageMetrics,
+                 on_drop: Optional[Callable[[Any], None]] = None):
+        if policy not in (self.BLOCK, self.DROP_NEWEST, self.DROP_OLDEST):
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.policy = policy
+        self.metrics = metrics
+        self.on_drop = on_drop
+        self._lock = threading.Lock()
+
+    def put(self, item) -> bool:
+        """Enqueue item under the queue's policy; returns False if it was dropped"""
+        if self.policy == self.BLOCK:
+            self._queue.put(item)
+        else:
+            with self._lock:
+                try:
+                    self._queue.put_nowait(item)
+                except queue.Full:
+                    if self.policy == self.DROP_NEWEST:
+                        self._drop(item)
+                        return False
+                    try:
+                        self._drop(self._queue.get_nowait())
+                        self._queue.task_done()
+                    except queue.Empty:
+                        pass
+                    self._queue.put_nowait(item)
+        self.metrics.record_depth(self._queue.qsize())
+        return True
+
+    def get(self, timeout: float = 0.1):
+        """Return the next item, or None if nothing arrived within timeout"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def task_done(self):
+        """Mark an item returned by get as fully handled"""
+        self._queue.task_done()
+
+    def idle(self) -> bool:
+        """Whether every queued item has been dropped or taken and marked done"""
+        return not self._queue.unfinished_tasks
+
+    def _drop(self, item):
+        self.metrics.record_drop()
+        if self.on_drop:
+            self.on_drop(item)
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+class ReorderBuffer:
+    """Releases sequence-numbered items in order even when workers finish out of order"""
+
+    def __init__(self, first_sequence: int = 1):
+        self._next = first_sequence
+        self._pending = {}
+        self._skipped = set()
+        self._lock = threading.Lock()
+
+    def skip(self, sequence: int):
+        """Mark a sequence number that will never arrive (dropped upstream)"""
+        with self._lock:
+            self._skipped.add(sequence)
+
+    def push(self, sequence: int, item) -> list:
+        """Add an item and return every item now ready, in sequence order"""
+        with self._lock:
+            self._pending[sequence] = item
+            ready = []
+            while True:
+                if self._next in self._skipped:
+                    self._skipped.discard(self._next)
+                elif self._next in self._pending:
+                    ready.append(self._pending.pop(self._next))
+                else:
+                    break
+                self._next += 1
+            return ready
+
+
+def monotonic_schedule(interval: float, stop_event: threading.Event):
+    """Yield once per interval on a fixed schedule, not drifting with work time"""
+    next_tick = time.monotonic()
+    while not stop_event.is_set():
+        yield
+        next_tick += interval
+        delay = next_tick - time.monotonic()
+        if delay < 0:
+            # Fell behind (e.g. machine slept); resume from now instead of bursting
+            next_tick = time.monotonic()
+            delay = 0
+        stop_event.wait(delay)
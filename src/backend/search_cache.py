@@ -0,0 +1,87 @@
+# src/backend/search_cache.py
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class SearchCache:
+    """
+    LRU cache of substring search results stamped with a write generation.
+
+    Entries are only valid for the generation they were computed at; the
+    first lookup at a newer generation drops the whole cache. A query that
+    extends a cached query ("reac" -> "react") is answered by filtering the
+    cached rows, which is exact as long as the cached result was complete
+    (not cut off by its limit) and neither query uses LIKE wildcards.
+    """
+
+    WILDCARDS = ('%', '_')
+    # SQLite's LIKE folds case for ASCII letters only
+    ASCII_FOLD = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple, Tuple[List[Dict], bool]]' = OrderedDict()
+        self._generation = None
+        self.hits = 0
+        self.refinements = 0
+        self.misses = 0
+
+    def _check_generation(self, generation: Hashable):
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, query: str, limit: int, options: Tuple, generation: Hashable,
+            refine: bool = True) -> Optional[List[Dict]]:
+        """Cached or prefix-refined results for query, or None on a miss"""
+        self._check_generation(generation)
+        key = (query, limit, options)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
+
+        if refine and not any(wildcard in query for wildcard in self.WILDCARDS):
+            results = self._refine(query, limit, options)
+            if results is not None:
+                self.refinements += 1
+                return results
+
+        self.misses += 1
+        return None
+
+    def _refine(self, query: str, limit: int, options: Tuple) -> Optional[List[Dict]]:
+        """Filter the longest complete cached result whose query the new one contains"""
+        best = None
+        for (cached_query, _, cached_options), (rows, truncated) in self._entries.items():
+            if (truncated or cached_options != options or len(cached_query) >= len(query)
+                    or any(wildcard in cached_query for wildcard in self.WILDCARDS)):
+                continue
+            if cached_query.translate(self.ASCII_FOLD) not in query.translate(self.ASCII_FOLD):
+                continue
+            if best is None or len(cached_query) > len(best[0]):
+                best = (cached_query, rows)
+        if best is None:
+            return None
+
+        needle = query.translate(self.ASCII_FOLD)
+        matches = [row for row in best[1] if needle in row['content'].translate(self.ASCII_FOLD)]
+        self.put(query, limit, options, self._generation, matches)
+        return matches[:limit]
+
+    def put(self, query: str, limit: int, options: Tuple, generation: Hashable, results: List[Dict]):
+        self._check_generation(generation)
+        truncated = len(results) >= limit
+        self._entries[(query, limit, options)] = (list(results[:limit]), truncated)
+        self._entries.move_to_end((query, limit, options))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self._generation = None
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'hits': self.hits,
+                'refinements': self.refinements, 'misses': self.misses}
@@ -0,0 +1,79 @@
+# src/backend/secret_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class SecretCache:
+    """
+    Short-lived, size-bounded cache of decrypted secrets for an unlocked session.
+
+    Plaintext is held in bytearrays so it can be overwritten in place when an
+    entry expires, is evicted or the cache is cleared. Entries expire a fixed
+    ttl after decryption (hits do not extend them) and a timer sweeps them,
+    so nothing outlives the ttl just because no one asked again.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 16):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    @staticmethod
+    def _wipe(buffer: bytearray):
+        buffer[:] = bytes(len(buffer))
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            self._purge_expired()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0].decode('utf-8')
+
+    def put(self, key: Hashable, plaintext: str):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._wipe(old[0])
+            self._entries[key] = (bytearray(plaintext.encode('utf-8')), time.monotonic() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._wipe(self._entries.popitem(last=False)[1][0])
+            self._schedule_sweep()
+
+    def clear(self):
+        with self._lock:
+            for buffer, _ in self._entries.values():
+                self._wipe(buffer)
+            self._entries.clear()
+            if self._sweeper:
+                self._sweeper.cancel()
+                self._sweeper = None
+
+    def _purge_expired(self):
+        """Wipe and drop expired entries; caller holds the lock"""
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]:
+            self._wipe(self._entries.pop(key)[0])
+
+    def _schedule_sweep(self):
+        """Arm a timer for the earliest expiry; caller holds the lock"""
+        if self._sweeper or not self._entries:
+            return
+        delay = max(0.0, min(expires_at for _, expires_at in self._entries.values()) - time.monotonic())
+        self._sweeper = threading.Timer(delay, self._sweep)
+        self._sweeper.daemon = True
+        self._sweeper.start()
+
+    def _sweep(self):
+        with self._lock:
+            self._sweeper = None
+            self._purge_expired()
+            self._schedule_sweep()
+
+    def __len__(self):
+        return len(self._entries)
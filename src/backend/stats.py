@@ -0,0 +1,166 @@
+# src/backend/stats.py
+from typing import Dict
+
+
+class ClipStats:
+    """
+    Aggregate clip counters kept current by SQLite triggers.
+
+    clip_stats holds counts, bytes, pinned and favorite totals per category and
+    clip_daily_stats holds counts and bytes per day, so dashboards and badges
+    read a handful of precomputed rows instead of scanning the clips table.
+
+    Existing clips are counted in batches by the 'stats' backfill. Until it
+    finishes, the triggers only follow clips it has already counted (ids up to
+    its saved position); the backfill picks up the rest as it reaches them,
+    and read() counts them live in the meantime.
+    """
+
+    BACKFILL_KEY = 'backfill:stats'
+
+    # Logical size of a clip: text, ciphertext and any referenced blob
+    BYTES_EXPR = ("(length(CAST({row}.content AS BLOB)) + COALESCE(length({row}.encrypted_data), 0)"
+                  " + COALESCE({row}.blob_size, 0))")
+    DAY_EXPR = "COALESCE(date({row}.timestamp), 'unknown')"
+
+    @classmethod
+    def _apply(cls, row: str, sign: str) -> str:
+        """Trigger statements adding (sign '+') or removing (sign '-') one clip row"""
+        size = cls.BYTES_EXPR.format(row=row)
+        day = cls.DAY_EXPR.format(row=row)
+        return f'''
+                INSERT OR IGNORE INTO clip_stats (category) VALUES ({row}.category);
+                UPDATE clip_stats SET
+                    clip_count = clip_count {sign} 1,
+                    total_bytes = total_bytes {sign} {size},
+                    pinned_count = pinned_count {sign} ({row}.is_pinned != 0),
+                    favorite_count = favorite_count {sign} ({row}.is_favorite != 0)
+                WHERE category = {row}.category;
+                INSERT OR IGNORE INTO clip_daily_stats (day, category) VALUES ({day}, {row}.category);
+                UPDATE clip_daily_stats SET
+                    clip_count = clip_count {sign} 1,
+                    total_bytes = total_bytes {sign} {size}
+                WHERE day = {day} AND category = {row}.category;
+        '''
+
+    @classmethod
+    def _counted(cls, row: str) -> str:
+        """Trigger condition: the row is already part of the aggregates"""
+        return (f"{row}.id <= COALESCE((SELECT CAST(value AS INTEGER) FROM settings"
+                f" WHERE key = '{cls.BACKFILL_KEY}'), {row}.id)")
+
+    @classmethod
+    def create_schema(cls, cursor):
+        """Create the aggregate tables and the triggers that maintain them"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS clip_stats (
+                category TEXT PRIMARY KEY,
+                clip_count INTEGER NOT NULL DEFAULT 0,
+                total_bytes INTEGER NOT NULL DEFAULT 0,
+                pinned_count INTEGER NOT NULL DEFAULT 0,
+                favorite_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS clip_daily_stats (
+                day TEXT NOT NULL,
+                category TEXT NOT NULL,
+                clip_count INTEGER NOT NULL DEFAULT 0,
+                total_bytes INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, category)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_stats_insert AFTER INSERT ON clips
+            WHEN {cls._counted('NEW')}
+            BEGIN {cls._apply('NEW', '+')} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_stats_delete AFTER DELETE ON clips
+            WHEN {cls._counted('OLD')}
+            BEGIN {cls._apply('OLD', '-')} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_stats_update
+            AFTER UPDATE OF content, category, timestamp, is_pinned, is_favorite, encrypted_data, blob_size
+            ON clips
+            WHEN {cls._counted('OLD')}
+            BEGIN {cls._apply('OLD', '-')} {cls._apply('NEW', '+')} END
+        ''')
+
+    @classmethod
+    def add_range(cls, cursor, first_id: int, last_id: int):
+        """Add the clips with ids in [first_id, last_id] to the aggregates"""
+        size = cls.BYTES_EXPR.format(row='clips')
+        day = cls.DAY_EXPR.format(row='clips')
+        cursor.execute(f'''
+            INSERT INTO clip_stats (category, clip_count, total_bytes, pinned_count, favorite_count)
+            SELECT category, COUNT(*), SUM({size}), SUM(is_pinned != 0), SUM(is_favorite != 0)
+            FROM clips WHERE id BETWEEN ? AND ? GROUP BY category
+            ON CONFLICT(category) DO UPDATE SET
+                clip_count = clip_count + excluded.clip_count,
+                total_bytes = total_bytes + excluded.total_bytes,
+                pinned_count = pinned_count + excluded.pinned_count,
+                favorite_count = favorite_count + excluded.favorite_count
+        ''', (first_id, last_id))
+        cursor.execute(f'''
+            INSERT INTO clip_daily_stats (day, category, clip_count, total_bytes)
+            SELECT {day}, category, COUNT(*), SUM({size})
+            FROM clips WHERE id BETWEEN ? AND ? GROUP BY 1, category
+            ON CONFLICT(day, category) DO UPDATE SET
+                clip_count = clip_count + excluded.clip_count,
+                total_bytes = total_bytes + excluded.total_bytes
+        ''', (first_id, last_id))
+
+    @classmethod
+    def read(cls, connection, days: int = 30) -> Dict:
+        """
+        Totals, per-category and per-day aggregates for the last `days` days.
+        While the backfill is pending, clips past its position are counted live.
+        """
+        size = cls.BYTES_EXPR.format(row='clips')
+        day = cls.DAY_EXPR.format(row='clips')
+        position = connection.execute('SELECT value FROM settings WHERE key = ?', (cls.BACKFILL_KEY,)).fetchone()
+        live_categories, live_daily, params = '', '', ()
+        if position is not None:
+            live_categories = f'''
+                UNION ALL
+                SELECT category, COUNT(*), SUM({size}), SUM(is_pinned != 0), SUM(is_favorite != 0)
+                FROM clips WHERE id > ? GROUP BY category
+            '''
+            live_daily = f'''
+                UNION ALL
+                SELECT {day}, category, COUNT(*), SUM({size}) FROM clips WHERE id > ? GROUP BY 1, category
+            '''
+            params = (int(position[0]),)
+
+        categories = {}
+        total = {'clip_count': 0, 'total_bytes': 0, 'pinned_count': 0, 'favorite_count': 0}
+        for row in connection.execute(f'''
+            SELECT category, SUM(clip_count) AS clip_count, SUM(total_bytes) AS total_bytes,
+                   SUM(pinned_count) AS pinned_count, SUM(favorite_count) AS favorite_count
+            FROM (
+                SELECT category, clip_count, total_bytes, pinned_count, favorite_count FROM clip_stats
+                {live_categories}
+            )
+            GROUP BY category HAVING SUM(clip_count) > 0
+        ''', params):
+            entry = {key: row[key] for key in total}
+            categories[row['category']] = entry
+            for key in total:
+                total[key] += entry[key]
+
+        daily = [
+            {'day': row['day'], 'clip_count': row['clip_count'], 'total_bytes': row['total_bytes']}
+            for row in connection.execute(f'''
+                SELECT day, SUM(clip_count) AS clip_count, SUM(total_bytes) AS total_bytes
+                FROM (
+                    SELECT day, category, clip_count, total_bytes FROM clip_daily_stats
+                    {live_daily}
+                )
+                WHERE day >= date('now', '-' || ? || ' days')
+                GROUP BY day HAVING SUM(clip_count) > 0
+                ORDER BY day
+            ''', (*params, days))
+        ]
+        return {'total': total, 'categories': categories, 'daily': daily}
@@ -0,0 +1,78 @@
+# src/backend/sync.py
+import json
+import os
+from typing import Dict, Optional
+
+from backend.blob_store import BlobStore
+from backend.database import ClipboardDatabase
+
+
+class ClipSyncer:
+    """
+    Incremental two-way sync between clip databases using their change logs.
+
+    Each side remembers the last change-log position it acknowledged for every
+    peer, so a sync only reads and applies changes made since then. The peer
+    can be another database file or an already open ClipboardDatabase. Each
+    side also records what the other acknowledged of its own log, and records
+    every known peer has applied are compacted away after the sync.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, database: ClipboardDatabase, blob_store: Optional[BlobStore] = None):
+        self.database = database
+        self.blob_store = blob_store
+
+    def sync_with_file(self, path: str) -> Dict[str, int]:
+        """Sync with the database file at path (created if missing)"""
+        peer = ClipboardDatabase(path)
+        peer_blobs = None
+        if self.blob_store:
+            peer_blobs = BlobStore(os.path.join(os.path.dirname(os.path.abspath(path)), 'blobs'))
+        try:
+            return self.sync_with(peer, peer_blobs)
+        finally:
+            peer.close()
+
+    def sync_with(self, peer: ClipboardDatabase, peer_blobs: Optional[BlobStore] = None) -> Dict[str, int]:
+        """Pull the peer's new changes, then push ours; returns counts of applied changes"""
+        if peer.device_id == self.database.device_id:
+            raise ValueError("Cannot sync a database with itself")
+        pulled = self._transfer(peer, self.database, peer_blobs, self.blob_store)
+        pushed = self._transfer(self.database, peer, self.blob_store, peer_blobs)
+        self.database.compact_changelog()
+        peer.compact_changelog()
+        return {'pulled': pulled, 'pushed': pushed}
+
+    def _transfer(self, source: ClipboardDatabase, target: ClipboardDatabase,
+                  source_blobs: Optional[BlobStore], target_blobs: Optional[BlobStore]) -> int:
+        """Apply source changes the target has not acknowledged yet"""
+        applied = 0
+        position = target.get_peer_position(source.device_id)
+        while True:
+            changes, last_seq = source.get_changes_since(
+                position, exclude_origin=target.device_id, limit=self.BATCH_SIZE
+            )
+            if last_seq == position:
+                break
+            for change in changes:
+                if target.apply_change(change):
+                    applied += 1
+                    self._copy_blob(change, source_blobs, target_blobs)
+            position = last_seq
+            target.set_peer_position(source.device_id, position)
+            source.set_peer_ack(target.device_id, position)
+        return applied
+
+    @staticmethod
+    def _copy_blob(change: Dict, source_blobs: Optional[BlobStore], target_blobs: Optional[BlobStore]):
+        """Bring over the blob an inserted clip references, when both stores are known"""
+        if change['op'] != 'insert' or not source_blobs or not target_blobs:
+            return
+        blob_hash = json.loads(change['payload']).get('blob_hash')
+        if not blob_hash or target_blobs.contains(blob_hash):
+            return
+        data = source_blobs.read(blob_hash)
+        if data is not None:
+            target_blobs.put(data)
@@ -7,7 +7,13 @@ class ClipboardApp {
         this.categoryInfo = {};
         this.searchTimeout = null;
         this.passwordLocked = true;
+        this.isSearching = false;
+        this.PAGE_SIZE = 500;
+        this.OVERSCAN_ROWS = 3;
+        this.clipLimit = this.PAGE_SIZE;
+        this.hasMoreClips = false;
         this.setupPreviewModal();
+        this.setupClipGrid();
         
         this.init();
     }
@@ -157,20 +163,40 @@ class ClipboardApp {
 
     async loadClips(category = 'all') {
         try {
+            // Archived clips fill in once the hot ones run out, so old history stays reachable
             let clipsJson;
             if (category === 'all') {
-                clipsJson = await window.pywebview.api.get_all_clips();
+                clipsJson = await window.pywebview.api.get_all_clips(this.clipLimit, false, true);
             } else {
-                clipsJson = await window.pywebview.api.get_clips_by_category(category);
+                clipsJson = await window.pywebview.api.get_clips_by_category(category, this.clipLimit, false, true);
             }
             
             this.clips = JSON.parse(clipsJson);
+            this.hasMoreClips = this.clips.length >= this.clipLimit;
+            this.isSearching = false;
+            await this.loadStats();
             this.renderClips();
         } catch (error) {
             console.error('Failed to load clips:', error);
         }
     }
 
+    async loadStats() {
+        try {
+            this.stats = JSON.parse(await window.pywebview.api.get_stats());
+        } catch (error) {
+            console.error('Failed to load stats:', error);
+        }
+    }
+
+    getTotalCount() {
+        // True totals come from the backend's precomputed stats, not the loaded page
+        if (!this.stats) return this.clips.length;
+        if (this.currentCategory === 'all') return this.stats.total.clip_count + (this.stats.archived_count || 0);
+        const categoryStats = this.stats.categories[this.currentCategory];
+        return categoryStats ? categoryStats.clip_count : 0;
+    }
+
     async loadSettings() {
         try {
             // Load category settings
@@ -198,26 +224,177 @@ class ClipboardApp {
 
     // ============= Rendering =============
 
+    setupClipGrid() {
+        // Cards are cached by clip id and reused while unchanged; one delegated listener serves them all
+        this.grid = document.getElementById('clipsGrid');
+        this.scroller = this.grid.closest('.main-content');
+        this.cardCache = new Map();
+        this.thumbnails = new Map();
+        this.clipsById = new Map();
+        this.cardHeight = 220;
+        this.renderScheduled = false;
+
+        this.grid.addEventListener('click', (event) => this.handleGridClick(event));
+        this.scroller.addEventListener('scroll', () => this.scheduleRender(), { passive: true });
+        window.addEventListener('resize', () => this.scheduleRender());
+    }
+
     renderClips() {
-        const grid = document.getElementById('clipsGrid');
         const emptyState = document.getElementById('emptyState');
         const clipCount = document.getElementById('clipCount');
+        this.clipsById = new Map(this.clips.map(clip => [clip.id, clip]));
 
         if (this.clips.length === 0) {
-            grid.style.display = 'none';
+            this.grid.style.display = 'none';
+            this.grid.replaceChildren();
+            this.cardCache.clear();
             emptyState.style.display = 'block';
             clipCount.textContent = '0 clips';
             return;
         }
 
-        grid.style.display = 'grid';
+        this.grid.style.display = 'grid';
         emptyState.style.display = 'none';
-        clipCount.textContent = `${this.clips.length} clip${this.clips.length !== 1 ? 's' : ''}`;
+        const total = Math.max(this.getTotalCount(), this.clips.length);
+        clipCount.textContent = total > this.clips.length
+            ? `${this.clips.length} of ${total} clips`
+            : `${total} clip${total !== 1 ? 's' : ''}`;
 
-        grid.innerHTML = this.clips.map(clip => this.createClipCard(clip)).join('');
-        
-        // Attach event listeners
-        this.attachClipEventListeners();
+        this.renderWindow();
+    }
+
+    scheduleRender() {
+        if (this.renderScheduled) return;
+        this.renderScheduled = true;
+        requestAnimationFrame(() => {
+            this.renderScheduled = false;
+            this.renderWindow();
+        });
+    }
+
+    renderWindow() {
+        // Only rows near the viewport get cards; padding stands in for the rows above and below
+        if (this.clips.length === 0) return;
+        const style = getComputedStyle(this.grid);
+        const columns = Math.max(1, style.gridTemplateColumns.split(' ').filter(Boolean).length);
+        const rowHeight = this.cardHeight + (parseFloat(style.rowGap) || 0);
+        const totalRows = Math.ceil(this.clips.length / columns);
+
+        const gridTop = this.grid.getBoundingClientRect().top
+            - this.scroller.getBoundingClientRect().top + this.scroller.scrollTop;
+        const viewTop = this.scroller.scrollTop - gridTop;
+        const firstRow = Math.min(totalRows, Math.max(0, Math.floor(viewTop / rowHeight) - this.OVERSCAN_ROWS));
+        const lastRow = Math.min(totalRows,
+            Math.max(firstRow, Math.ceil((viewTop + this.scroller.clientHeight) / rowHeight) + this.OVERSCAN_ROWS));
+
+        this.grid.style.paddingTop = `${firstRow * rowHeight}px`;
+        this.grid.style.paddingBottom = `${(totalRows - lastRow) * rowHeight}px`;
+        this.patchCards(this.clips.slice(firstRow * columns, lastRow * columns));
+
+        const firstCard = this.grid.firstElementChild;
+        if (firstCard && firstCard.offsetHeight && firstCard.offsetHeight !== this.cardHeight) {
+            this.cardHeight = firstCard.offsetHeight;
+            this.scheduleRender();
+        }
+
+        if (lastRow >= totalRows - this.OVERSCAN_ROWS) {
+            this.loadMoreClips();
+        }
+    }
+
+    patchCards(visibleClips) {
+        // Walk the wanted order, moving or inserting only cards that are out of place
+        const wanted = new Set();
+        let cursor = this.grid.firstElementChild;
+        for (const clip of visibleClips) {
+            const element = this.getCardElement(clip);
+            wanted.add(clip.id);
+            if (element === cursor) {
+                cursor = cursor.nextElementSibling;
+            } else {
+                this.grid.insertBefore(element, cursor);
+            }
+        }
+        while (cursor) {
+            const next = cursor.nextElementSibling;
+            cursor.remove();
+            cursor = next;
+        }
+        for (const id of this.cardCache.keys()) {
+            if (!wanted.has(id)) this.cardCache.delete(id);
+        }
+    }
+
+    getCardElement(clip) {
+        const signature = this.cardSignature(clip);
+        const cached = this.cardCache.get(clip.id);
+        if (cached && cached.signature === signature) return cached.element;
+
+        const template = document.createElement('template');
+        template.innerHTML = this.createClipCard(clip).trim();
+        const element = template.content.firstElementChild;
+        this.cardCache.set(clip.id, { element, signature });
+        if (clip.category === 'image' && clip.blob_hash && !this.thumbnails.has(clip.blob_hash)) {
+            this.loadThumbnail(clip, element);
+        }
+        return element;
+    }
+
+    async loadThumbnail(clip, element, attempt = 0) {
+        // Thumbnails render in the background; poll a few times until this one is ready
+        let uri = '';
+        try {
+            uri = await window.pywebview.api.get_clip_thumbnail(clip.id);
+        } catch (error) {
+            console.error('Failed to load thumbnail:', error);
+            return;
+        }
+        if (!uri) {
+            if (attempt < 5) setTimeout(() => this.loadThumbnail(clip, element, attempt + 1), 500 * (attempt + 1));
+            return;
+        }
+        this.thumbnails.set(clip.blob_hash, uri);
+        const image = element.querySelector('.clip-thumb');
+        if (image) image.src = uri;
+    }
+
+    cardSignature(clip) {
+        // Everything createClipCard reads; a card is rebuilt only when this changes
+        return [
+            clip.category, clip.timestamp, clip.is_pinned, clip.is_favorite, clip.is_encrypted, clip.archived,
+            clip.category === 'password' && this.passwordLocked,
+            clip.content.length, clip.content.substring(0, 200),
+            // Bumped by every edit, local or synced, including ones past the first 200 characters
+            clip.updated_at, clip.updated_by
+        ].join('\u0000');
+    }
+
+    async loadMoreClips() {
+        // Fetch only the page after the loaded clips and append it
+        if (this.loadingMore || this.isSearching || !this.hasMoreClips) return;
+        // Category totals only cover hot clips; archived ones keep coming until a short page
+        if (this.currentCategory === 'all' && this.getTotalCount() <= this.clips.length) return;
+        const category = this.currentCategory;
+        const offset = this.clips.length;
+        this.loadingMore = true;
+        try {
+            const pageJson = category === 'all'
+                ? await window.pywebview.api.get_all_clips(this.PAGE_SIZE, false, true, offset)
+                : await window.pywebview.api.get_clips_by_category(category, this.PAGE_SIZE, false, true, offset);
+            // A reload or search replaced the list while this page was in flight
+            if (category !== this.currentCategory || this.isSearching || offset !== this.clips.length) return;
+
+            const page = JSON.parse(pageJson);
+            // Clips captured since the last load shift the offsets; skip any already shown
+            this.clips = this.clips.concat(page.filter(clip => !this.clipsById.has(clip.id)));
+            this.clipLimit += this.PAGE_SIZE;
+            this.hasMoreClips = page.length >= this.PAGE_SIZE;
+            this.renderClips();
+        } catch (error) {
+            console.error('Failed to load more clips:', error);
+        } finally {
+            this.loadingMore = false;
+        }
     }
 
     createClipCard(clip) {
@@ -226,12 +403,17 @@ class ClipboardApp {
         const isPassword = category === 'password';
         const isEncrypted = clip.is_encrypted;
         const isMasked = isPassword && this.passwordLocked;
+        // Archived clips are read-only; only copying them is supported
+        const isArchived = Boolean(clip.archived);
 
         const truncatedContent = clip.content.length > 200 
             ? clip.content.substring(0, 200) + '...' 
             : clip.content;
 
         const timeAgo = this.formatTimestampIST(clip.timestamp);
+        const thumbnail = category === 'image' && clip.blob_hash
+            ? `<img class="clip-thumb" alt="" src="${this.thumbnails.get(clip.blob_hash) || ''}">`
+            : '';
 
         return `
             <div class="clip-card" data-id="${clip.id}" style="--category-color: ${info.color}">
@@ -241,17 +423,20 @@ class ClipboardApp {
                         <span>${category}</span>
                     </div>
                     <div class="clip-actions">
-                        ${clip.is_pinned ? 
-                            '<button class="clip-action-btn" data-action="unpin" title="Unpin">📌</button>' :
-                            '<button class="clip-action-btn" data-action="pin" title="Pin">📍</button>'
-                        }
-                        ${clip.is_favorite ? 
-                            '<button class="clip-action-btn" data-action="unfavorite" title="Unfavorite">⭐</button>' :
-                            '<button class="clip-action-btn" data-action="favorite" title="Favorite">☆</button>'
-                        }
-                        <button class="clip-action-btn" data-action="delete" title="Delete">🗑️</button>
+                        ${isArchived ? '<span class="clip-archived" title="Archived clips are read-only">🗄️ archived</span>' : `
+                            ${clip.is_pinned ? 
+                                '<button class="clip-action-btn" data-action="unpin" title="Unpin">📌</button>' :
+                                '<button class="clip-action-btn" data-action="pin" title="Pin">📍</button>'
+                            }
+                            ${clip.is_favorite ? 
+                                '<button class="clip-action-btn" data-action="unfavorite" title="Unfavorite">⭐</button>' :
+                                '<button class="clip-action-btn" data-action="favorite" title="Favorite">☆</button>'
+                            }
+                            <button class="clip-action-btn" data-action="delete" title="Delete">🗑️</button>
+                        `}
                     </div>
                 </div>
+                ${thumbnail}
                 <div class="clip-content ${isMasked ? 'masked' : ''}">${this.escapeHtml(truncatedContent)}</div>
                 ${isMasked ? `
                     <div style="margin-top: 0.5rem;">
@@ -270,29 +455,21 @@ class ClipboardApp {
         `;
     }
 
-    attachClipEventListeners() {
-        document.querySelectorAll('.clip-card').forEach(card => {
-            const clipId = parseInt(card.dataset.id);
-            const clip = this.clips.find(c => c.id === clipId);
-        
-            card.addEventListener('click', (event) => {
-                if (clip && clip.category === 'password' && this.passwordLocked) {
-                    // Check if click target is the unlock button
-                    if (!event.target.closest('[data-action="unlock"]')) {
-                        // Ignore clicks outside the unlock button - do not open preview
-                        return;
-                    }
-                }
-                if (clip) this.openPreview(clip);
-            });
-    
-            card.querySelectorAll('[data-action]').forEach(btn => {
-                btn.addEventListener('click', (e) => {
-                    e.stopPropagation();
-                    this.handleClipAction(clipId, btn.dataset.action);
-                });
-            });
-        });
+    handleGridClick(event) {
+        const card = event.target.closest('.clip-card');
+        if (!card) return;
+        const clipId = parseInt(card.dataset.id);
+
+        const button = event.target.closest('[data-action]');
+        if (button) {
+            this.handleClipAction(clipId, button.dataset.action);
+            return;
+        }
+
+        const clip = this.clipsById.get(clipId);
+        // Locked passwords only respond to their unlock button
+        if (!clip || (clip.category === 'password' && this.passwordLocked)) return;
+        this.openPreview(clip);
     }
     
 
@@ -306,17 +483,24 @@ class ClipboardApp {
                     break;
                 case 'pin':
                 case 'unpin':
-                    await window.pywebview.api.toggle_pin(clipId);
+                    // The toggles return the new state, which only misses when the clip could not be changed
+                    if (await window.pywebview.api.toggle_pin(clipId) !== (action === 'pin')) {
+                        this.showNotification('⚠️ Could not change the pin on this clip');
+                    }
                     await this.loadClips(this.currentCategory);
                     break;
                 case 'favorite':
                 case 'unfavorite':
-                    await window.pywebview.api.toggle_favorite(clipId);
+                    if (await window.pywebview.api.toggle_favorite(clipId) !== (action === 'favorite')) {
+                        this.showNotification('⚠️ Could not change the favorite on this clip');
+                    }
                     await this.loadClips(this.currentCategory);
                     break;
                 case 'delete':
                     if (confirm('Delete this clip?')) {
-                        await window.pywebview.api.delete_clip(clipId);
+                        if (!await window.pywebview.api.delete_clip(clipId)) {
+                            this.showNotification('⚠️ Could not delete this clip');
+                        }
                         await this.loadClips(this.currentCategory);
                     }
                     break;
@@ -375,6 +559,8 @@ class ClipboardApp {
                 
                 const category = btn.dataset.category;
                 this.currentCategory = category;
+                this.clipLimit = this.PAGE_SIZE;
+                this.scroller.scrollTop = 0;
                 
                 // Update title
                 const title = btn.textContent.trim();
@@ -424,8 +610,10 @@ class ClipboardApp {
                 return;
             }
             
-            const success = await window.pywebview.api.setup_passkey(passkey);
-            if (success) {
+            // Key derivation is slow, so it runs as a background job
+            const jobId = await window.pywebview.api.start_passkey_setup_job(passkey);
+            const job = await this.waitForJob(jobId, '🔑 Setting passkey');
+            if (job.status === 'completed' && job.result) {
                 document.getElementById('passkeySetup').style.display = 'none';
                 document.getElementById('passkeyStatus').style.display = 'block';
                 this.showNotification('✅ Passkey set successfully!');
@@ -441,22 +629,27 @@ class ClipboardApp {
             this.showNotification('🔒 Passwords locked');
         });
 
-        // Cleanup
+        // Cleanup (runs as a background job so the UI stays responsive)
         const cleanupBtn = document.getElementById('cleanupBtn');
         cleanupBtn.addEventListener('click', async () => {
             if (confirm('Delete clips older than 30 days?')) {
-                const deleted = await window.pywebview.api.cleanup_old_clips(30);
-                this.showNotification(`🗑️ Deleted ${deleted} old clips`);
-                await this.loadClips(this.currentCategory);
+                const jobId = await window.pywebview.api.start_cleanup_job(30);
+                const job = await this.waitForJob(jobId, '🗑️ Cleaning up');
+                if (job.status === 'completed') {
+                    this.showNotification(`🗑️ Deleted ${job.result} old clips`);
+                    await this.loadClips(this.currentCategory);
+                }
             }
         });
 
         // Export
         const exportBtn = document.getElementById('exportBtn');
         exportBtn.addEventListener('click', async () => {
-            const data = await window.pywebview.api.export_clips();
-            this.downloadFile('clipboard_export.json', data);
-            this.showNotification('📤 Clips exported!');
+            const jobId = await window.pywebview.api.start_export_job();
+            const job = await this.waitForJob(jobId, '📤 Exporting');
+            if (job.status === 'completed') {
+                alert('Export completed! File saved at:\n' + job.result);
+            }
         });
 
         // Manual snippet add
@@ -493,21 +686,53 @@ class ClipboardApp {
         }
 
         try {
-            const results = await window.pywebview.api.search_clips(query);
+            const results = await window.pywebview.api.search_clips(query, false, true);
             this.clips = JSON.parse(results);
+            this.isSearching = true;
+            this.scroller.scrollTop = 0;
             this.renderClips();
         } catch (error) {
             console.error('Search failed:', error);
         }
     }
 
+    // ============= Background Jobs =============
+
+    async waitForJob(jobId, label) {
+        // Poll a backend job until it finishes, surfacing progress and failures
+        let lastShown = -1;
+        while (true) {
+            const job = JSON.parse(await window.pywebview.api.get_job(jobId));
+            if (!job) return { status: 'failed', error: 'Unknown job' };
+            if (['completed', 'failed', 'cancelled'].includes(job.status)) {
+                if (job.status === 'failed') {
+                    this.showNotification(`⚠️ ${label} failed: ${job.error}`);
+                }
+                return job;
+            }
+            if (job.progress !== null) {
+                const percent = Math.floor(job.progress * 100);
+                if (percent >= lastShown + 25) {
+                    this.showNotification(`${label}… ${percent}%`);
+                    lastShown = percent;
+                }
+            }
+            await new Promise(resolve => setTimeout(resolve, 500));
+        }
+    }
+
     // ============= Utilities =============
 
     startAutoRefresh() {
-        // Refresh clips every 2 seconds to catch new ones
+        // Check every 2 seconds for new clips; the precomputed stats are cheap,
+        // so the clip list is only refetched when they have moved
         setInterval(async () => {
             if (this.currentCategory === 'all' && !document.getElementById('searchInput').value) {
-                await this.loadClips('all');
+                const before = JSON.stringify(this.stats && this.stats.total);
+                await this.loadStats();
+                if (JSON.stringify(this.stats && this.stats.total) !== before) {
+                    await this.loadClips('all');
+                }
             }
         }, 2000);
     }
@@ -591,24 +816,6 @@ document.addEventListener('DOMContentLoaded', () => {
     window.clipboardApp = new ClipboardApp();
 });
 
-// Export all clips
-document.getElementById('exportBtn').onclick = async function() {
-    try {
-        const filePath = await window.pywebview.api.export_clips_to_file();
-        console.log("Exported file path:", filePath);
-        alert('Export completed! File saved at:\n' + filePath);
-    } catch (error) {
-        alert('Export failed: ' + error.message);
-    }
-};
-
-
-document.getElementById('cleanupBtn').onclick = async function() {
-    if (window.pywebview) {
-        await window.pywebview.api.cleanup_old_clips();
-        // Optionally: refresh UI
-    }
-};
 const unlockModal = document.getElementById('unlockModal');
 const unlockCloseBtn = document.getElementById('unlockCloseBtn');
 
@@ -0,0 +1,365 @@
+# src/load_harness.py
+"""
+Load harness for the clipboard capture path.
+
+Drives ClipboardService (or the background ClipboardPoller) through a
+FakeClipboardBackend against a throwaway database, then reports dropped
+clips, copy-to-stored latency percentiles, memory growth and database size
+over time. Exits with status 1 when a threshold is exceeded.
+
+    python load_harness.py burst --copies 2000 --rate 500
+    python load_harness.py huge --copies 20 --size-mb 5
+    python load_harness.py soak --duration 600 --rate 20
+    python load_harness.py burst --target poller --poll-interval 0.01
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# The service needs a QApplication; let the harness run headless
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from backend.categorizer import ContentCategorizer
+from backend.clipboard_backend import FakeClipboardBackend
+from backend.clipboard_service import ClipboardPoller, ClipboardService
+from backend.database import ClipboardDatabase
+from backend.pipeline import BoundedQueue
+
+WORDS = ('alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike '
+         'november oscar papa quebec romeo sierra tango uniform victor whiskey xray yankee zulu').split()
+
+# Workload and pass/fail thresholds per scenario; every value can be overridden on the command line.
+# max_db_overhead is database growth per stored clip beyond the clip text itself, in bytes.
+SCENARIOS = {
+    'burst': {'copies': 2000, 'rate': 500.0, 'size': 200, 'max_drop_rate': 0.01,
+              'max_p99_ms': 1000.0, 'max_memory_growth_mb': 100.0, 'max_db_overhead': 16384},
+    'huge': {'copies': 20, 'rate': 2.0, 'size': 5 * 1024 * 1024, 'max_drop_rate': 0.0,
+             'max_p99_ms': 10000.0, 'max_memory_growth_mb': 300.0, 'max_db_overhead': 16384},
+    'soak': {'copies': None, 'rate': 20.0, 'size': 400, 'max_drop_rate': 0.01,
+             'max_p99_ms': 500.0, 'max_memory_growth_mb': 50.0, 'max_db_overhead': 16384},
+}
+
+
+class InstrumentedDatabase(ClipboardDatabase):
+    """ClipboardDatabase that records when each load-test clip was stored"""
+
+    def __init__(self, db_path: str):
+        self.stored_at = {}
+        self._uncommitted = []
+        super().__init__(db_path)
+
+    def add_clip(self, content, category, *args, **kwargs):
+        clip_id = super().add_clip(content, category, *args, **kwargs)
+        seq = parse_sequence(content)
+        if seq is not None:
+            self._uncommitted.append(seq)
+            if not self._batch_depth:
+                self._mark_stored()
+        return clip_id
+
+    @contextmanager
+    def batch(self):
+        with super().batch():
+            yield self
+        # Clips written inside a batch only count as stored once it has committed
+        if not self._batch_depth:
+            self._mark_stored()
+
+    def _mark_stored(self):
+        now = time.perf_counter()
+        for seq in self._uncommitted:
+            self.stored_at[seq] = now
+        self._uncommitted = []
+
+
+def make_clip(seq: int, size: int, rng: random.Random) -> str:
+    """Unique text of roughly size bytes whose first line carries its sequence number"""
+    header = f'loadtest {seq:09d}\n'
+    words = []
+    length = len(header)
+    while length < size:
+        # Draw words in bulk so generating a huge clip does not eat into the pipeline's time
+        chunk = rng.choices(WORDS, k=(size - length) // 7 + 1)
+        words.extend(chunk)
+        length += sum(map(len, chunk)) + len(chunk)
+    return header + ' '.join(words)
+
+
+def parse_sequence(content: str):
+    if not content.startswith('loadtest '):
+        return None
+    try:
+        return int(content[9:18])
+    except ValueError:
+        return None
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where it cannot be read"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+    return None
+
+
+def database_bytes(db_path: str) -> int:
+    return sum(os.path.getsize(path) for path in (db_path, db_path + '-wal', db_path + '-journal')
+               if os.path.exists(path))
+
+
+def checkpoint(database: InstrumentedDatabase):
+    """Fold the write-ahead log into the main file so size comparisons are not skewed by it"""
+    with database.lock:
+        database.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+def percentile(samples, fraction: float):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))]
+
+
+class Sampler(threading.Thread):
+    """Records memory, database size and stored-clip count at a fixed interval"""
+
+    def __init__(self, database: InstrumentedDatabase, interval: float):
+        super().__init__(daemon=True)
+        self.database = database
+        self.interval = interval
+        self.samples = []
+        self.started = time.perf_counter()
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        self.samples.append({
+            'elapsed': round(time.perf_counter() - self.started, 2),
+            'rss': rss_bytes(),
+            'db_bytes': database_bytes(self.database.db_path),
+            'stored': len(self.database.stored_at),
+        })
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+def start_target(args, database, backend):
+    """Start the capture path under test; returns a callable that stops it"""
+    categorizer = ContentCategorizer()
+    if args.target == 'poller':
+        poller = ClipboardPoller(categorizer, interval=args.poll_interval, backend=backend, database=database)
+        poller.start()
+        return poller.stop, None
+
+    service = ClipboardService(categorizer, database, backend=backend, poll_interval=args.poll_interval,
+                               classify_workers=args.workers, capture_policy=args.policy)
+    service.start_monitoring()
+    return service.stop_monitoring, service
+
+
+def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix='clip-load-')
+    db_path = os.path.join(workdir, 'load.db')
+    database = InstrumentedDatabase(db_path)
+    backend = FakeClipboardBackend()
+    rng = random.Random(args.seed)
+
+    stop_target, service = start_target(args, database, backend)
+    sampler = Sampler(database, args.sample_interval)
+    checkpoint(database)
+    sampler.sample()
+    sampler.start()
+
+    copied_at = {}
+    payload_bytes = 0
+    interval = 1.0 / args.rate
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    started = time.perf_counter()
+    seq = 0
+    try:
+        while (args.copies is None or seq < args.copies) and (deadline is None or time.perf_counter() < deadline):
+            # Pace against the planned schedule so slow iterations do not lower the rate
+            delay = started + seq * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            text = make_clip(seq, args.size, rng)
+            backend.set_text(text)
+            copied_at[seq] = time.perf_counter()
+            payload_bytes += len(text.encode('utf-8'))
+            seq += 1
+        copy_seconds = time.perf_counter() - started
+
+        # Let the pipeline drain; stop once everything is stored or progress stalls
+        last_count, last_progress = -1, time.perf_counter()
+        while len(database.stored_at) < len(copied_at):
+            count = len(database.stored_at)
+            if count != last_count:
+                last_count, last_progress = count, time.perf_counter()
+            elif time.perf_counter() - last_progress > args.settle:
+                break
+            time.sleep(0.05)
+    finally:
+        stop_target()
+        checkpoint(database)
+        sampler.stop()
+
+    latencies = [database.stored_at[seq] - copied for seq, copied in copied_at.items()
+                 if seq in database.stored_at]
+    stored = len(latencies)
+    first, last = sampler.samples[0], sampler.samples[-1]
+    report = {
+        'scenario': args.scenario,
+        'target': args.target,
+        'copies': len(copied_at),
+        'stored': stored,
+        'dropped': len(copied_at) - stored,
+        'drop_rate': round((len(copied_at) - stored) / len(copied_at), 4) if copied_at else 0.0,
+        'copy_rate': round(len(copied_at) / copy_seconds, 1) if copy_seconds else None,
+        'latency_ms': {
+            name: round(value * 1000, 2) if value is not None else None
+            for name, value in (('p50', percentile(latencies, 0.50)), ('p95', percentile(latencies, 0.95)),
+                                ('p99', percentile(latencies, 0.99)), ('max', max(latencies, default=None)))
+        },
+        'memory_growth_mb': (round((last['rss'] - first['rss']) / 2 ** 20, 1)
+                             if first['rss'] is not None and last['rss'] is not None else None),
+        'db_growth_mb': round((last['db_bytes'] - first['db_bytes']) / 2 ** 20, 2),
+        'db_overhead_per_clip': (round((last['db_bytes'] - first['db_bytes'] - payload_bytes * stored
+                                        / max(1, len(copied_at))) / stored) if stored else None),
+        'timeline': sampler.samples,
+    }
+    if service is not None:
+        report['stages'] = service.get_pipeline_metrics()
+
+    database.close()
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    else:
+        report['database'] = db_path
+    return report
+
+
+def check_thresholds(report: dict, args) -> list:
+    failures = []
+    if report['drop_rate'] > args.max_drop_rate:
+        failures.append(f"drop rate {report['drop_rate']:.2%} > {args.max_drop_rate:.2%}")
+    p99 = report['latency_ms']['p99']
+    if p99 is not None and p99 > args.max_p99_ms:
+        failures.append(f"p99 latency {p99} ms > {args.max_p99_ms} ms")
+    growth = report['memory_growth_mb']
+    if growth is not None and growth > args.max_memory_growth_mb:
+        failures.append(f"memory growth {growth} MB > {args.max_memory_growth_mb} MB")
+    overhead = report['db_overhead_per_clip']
+    if overhead is not None and overhead > args.max_db_overhead:
+        failures.append(f"database overhead {overhead} bytes/clip > {args.max_db_overhead}")
+    return failures
+
+
+def print_report(report: dict):
+    latency = report['latency_ms']
+    print(f"{report['scenario']} via {report['target']}: {report['copies']} copies "
+          f"at {report['copy_rate']}/s, {report['stored']} stored, {report['dropped']} dropped "
+          f"({report['drop_rate']:.2%})")
+    print(f"  latency ms  p50={latency['p50']}  p95={latency['p95']}  p99={latency['p99']}  max={latency['max']}")
+    print(f"  memory growth {report['memory_growth_mb']} MB, database growth {report['db_growth_mb']} MB "
+          f"({report['db_overhead_per_clip']} bytes/clip beyond payload)")
+    for name, stage in report.get('stages', {}).items():
+        print(f"  {name:<11} processed={stage['processed']} dropped={stage['dropped']} "
+              f"errors={stage['errors']} max_depth={stage['max_queue_depth']}")
+    if len(report['timeline']) > 2:
+        print('  elapsed(s)  rss(MB)  db(MB)  stored')
+        for sample in report['timeline']:
+            rss = f"{sample['rss'] / 2 ** 20:.1f}" if sample['rss'] is not None else '-'
+            print(f"  {sample['elapsed']:>10}  {rss:>7}  {sample['db_bytes'] / 2 ** 20:>6.2f}  {sample['stored']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Burst, huge-clip and soak load runs for clipboard capture')
+    parser.add_argument('scenario', choices=sorted(SCENARIOS))
+    parser.add_argument('--target', choices=('service', 'poller'), default='service')
+    parser.add_argument('--copies', type=int, help='number of copies (soak runs until --duration)')
+    parser.add_argument('--rate', type=float, help='copies per second')
+    parser.add_argument('--size', type=int, help='clip size in bytes')
+    parser.add_argument('--size-mb', type=float, help='clip size in megabytes')
+    parser.add_argument('--duration', type=float, help='stop copying after this many seconds')
+    parser.add_argument('--poll-interval', type=float, default=0.001)
+    parser.add_argument('--workers', type=int, default=2, help='classify workers (service only)')
+    parser.add_argument('--policy', default=BoundedQueue.DROP_OLDEST,
+                        choices=(BoundedQueue.DROP_OLDEST, BoundedQueue.DROP_NEWEST, BoundedQueue.BLOCK))
+    parser.add_argument('--settle', type=float, default=5.0, help='seconds without progress before giving up')
+    parser.add_argument('--sample-interval', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-drop-rate', type=float)
+    parser.add_argument('--max-p99-ms', type=float)
+    parser.add_argument('--max-memory-growth-mb', type=float)
+    parser.add_argument('--max-db-overhead', type=int, help='bytes per clip beyond the payload')
+    parser.add_argument('--json', help='also write the full report to this file')
+    parser.add_argument('--keep', action='store_true', help='keep the load database for inspection')
+    args = parser.parse_args(argv)
+
+    defaults = SCENARIOS[args.scenario]
+    args.copies = args.copies if args.copies is not None else defaults['copies']
+    args.rate = args.rate or defaults['rate']
+    args.size = int(args.size_mb * 2 ** 20) if args.size_mb else (args.size or defaults['size'])
+    for name in ('max_drop_rate', 'max_p99_ms', 'max_memory_growth_mb', 'max_db_overhead'):
+        if getattr(args, name) is None:
+            setattr(args, name, defaults[name])
+    if args.scenario == 'soak' and args.duration is None and args.copies is None:
+        args.duration = 300.0
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    failures = check_thresholds(report, args)
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if not failures:
+        print('PASS')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# The application imports its modules as top-level packages from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from backend.database import ClipboardDatabase  # noqa: E402
+
+
+@pytest.fixture
+def make_db(tmp_path):
+    """Open ClipboardDatabase files under tmp_path, closing them after the test"""
+    opened = []
+
+    def make(name='clips.db'):
+        database = ClipboardDatabase(str(tmp_path / name))
+        opened.append(database)
+        return database
+
+    yield make
+    for database in opened:
+        database.close()
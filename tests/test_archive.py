@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from backend.archive import HistoryArchiver
+from backend.sync import ClipSyncer
+
+
+@pytest.fixture
+def archiver(make_db):
+    database = make_db()
+    database.write_clip({'content': 'March budget draft', 'category': 'text', 'timestamp': '2020-03-04 10:00:00'})
+    database.write_clip({'content': 'March standup notes', 'category': 'text', 'timestamp': '2020-03-20 09:30:00'})
+    database.write_clip({'content': 'April travel plan', 'category': 'text', 'timestamp': '2020-04-02 18:00:00'})
+    database.write_clip({'content': 'Pinned April link', 'category': 'text', 'timestamp': '2020-04-05 12:00:00',
+                         'is_pinned': 1})
+    database.add_clip('Captured today', 'text')
+    return HistoryArchiver(database)
+
+
+def test_old_clips_round_trip_through_monthly_archives(archiver):
+    database = archiver.database
+    hot_ids = {clip['content']: clip['id'] for clip in database.get_all_clips()}
+
+    assert archiver.archive_old_clips(days=90, batch_size=2) == 3
+    assert archiver.get_months() == ['2020_04', '2020_03']
+    assert archiver.get_archived_count() == 3
+    assert sorted(clip['content'] for clip in database.get_all_clips()) == ['Captured today', 'Pinned April link']
+
+    archived = archiver.get_archived_clips()
+    assert [clip['content'] for clip in archived] == [
+        'April travel plan', 'March standup notes', 'March budget draft',
+    ]
+    assert all(clip['archived'] for clip in archived)
+    assert [clip['content'] for clip in archiver.get_archived_clips(limit=1, offset=1)] == ['March standup notes']
+
+    clip = archiver.get_clip(hot_ids['March budget draft'])
+    assert clip['content'] == 'March budget draft' and clip['archive_month'] == '2020_03'
+    assert [clip['content'] for clip in archiver.search_archive('march')] == [
+        'March standup notes', 'March budget draft',
+    ]
+
+
+def test_archived_clips_cannot_be_changed_from_the_hot_table(archiver):
+    database = archiver.database
+    clip_id = next(clip['id'] for clip in database.get_all_clips() if clip['content'] == 'April travel plan')
+    archiver.archive_old_clips(days=90)
+
+    assert database.toggle_pin(clip_id) is False
+    assert database.toggle_favorite(clip_id) is False
+    assert database.delete_clip(clip_id) is False
+    assert archiver.get_clip(clip_id)['content'] == 'April travel plan'
+
+
+def test_archived_clips_still_sync(archiver, make_db):
+    archiver.archive_old_clips(days=90)
+    peer = make_db('peer.db')
+
+    ClipSyncer(archiver.database).sync_with(peer)
+
+    assert sorted(clip['content'] for clip in peer.get_all_clips()) == [
+        'April travel plan', 'Captured today', 'March budget draft', 'March standup notes', 'Pinned April link',
+    ]
+
+
+def test_retention_removes_expired_archives(archiver):
+    archiver.archive_old_clips(days=90)
+    march = archiver.archive_path('2020_03')
+    assert os.path.exists(march)
+
+    assert archiver.cleanup_old_clips(days=30) == 3
+    assert archiver.get_months() == []
+    assert archiver.get_archived_count() == 0
+    assert not os.path.exists(march)
@@ -0,0 +1,25 @@
+import os
+import time
+
+from backend.blob_store import BlobStore
+
+
+def age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_garbage_collection_spares_recent_blobs_and_thumbnails(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    kept, stale, fresh = store.put(b'kept'), store.put(b'stale'), store.put(b'fresh')
+    thumbs = tmp_path / 'blobs' / 'thumbs'
+    thumbs.mkdir()
+    for blob_hash in (kept, stale, fresh):
+        (thumbs / f'{blob_hash}_256.png').write_bytes(b'png')
+    for path in (store.path_for(kept), store.path_for(stale), thumbs / f'{kept}_256.png', thumbs / f'{stale}_256.png'):
+        age(path, BlobStore.GC_GRACE_SECONDS + 60)
+
+    assert store.collect_garbage([kept]) == 1
+
+    assert store.contains(kept) and store.contains(fresh) and not store.contains(stale)
+    assert sorted(os.listdir(thumbs)) == sorted([f'{kept}_256.png', f'{fresh}_256.png'])
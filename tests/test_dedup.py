@@ -0,0 +1,56 @@
+import sqlite3
+import threading
+
+from backend.migrations import MIGRATIONS, MigrationRunner
+
+
+def make_legacy_db(path, contents):
+    """A database from before near-duplicate detection, holding plain text clips"""
+    connection = sqlite3.connect(path)
+    MigrationRunner(connection, threading.RLock(), {}, MIGRATIONS[:1]).migrate()
+    connection.executemany("INSERT INTO clips (content, category) VALUES (?, 'text')",
+                           [(content,) for content in contents])
+    connection.commit()
+    connection.close()
+
+
+def test_near_duplicates_share_a_cluster(make_db):
+    database = make_db()
+    first = database.add_clip('Meeting notes for the quarterly review', 'text')
+    database.add_clip('Something else entirely different here', 'text')
+    second = database.add_clip('  meeting NOTES for the quarterly   review ', 'text')
+
+    assert database.find_near_duplicate('meeting notes for the quarterly review', 'text') == second
+    assert database.count_clips(collapse_duplicates=True) == 2
+    assert database.merge_near_duplicates() == 1
+    assert database.get_clip_by_id(first) is None
+    assert database.get_clip_by_id(second) is not None
+
+
+def test_merge_keeps_flags_of_removed_duplicates(make_db):
+    database = make_db()
+    old = database.add_clip('Shopping list: eggs, milk, bread', 'text')
+    database.toggle_pin(old)
+    new = database.add_clip('shopping list:  eggs, milk, bread', 'text')
+
+    assert database.merge_near_duplicates() == 1
+    assert database.get_clip_by_id(new)['is_pinned']
+
+
+def test_backfill_clusters_legacy_clips(tmp_path, make_db):
+    path = tmp_path / 'legacy.db'
+    make_legacy_db(str(path), [
+        'Deploy checklist for Friday', 'Lunch order', 'deploy checklist for  FRIDAY',
+        'lunch   order', 'Deploy Checklist for Friday',
+    ])
+
+    database = make_db('legacy.db')
+    assert 'dedup' in database.pending_backfills()
+    database.run_backfills(batch_size=2)
+
+    assert database.pending_backfills() == []
+    assert len(database.get_all_clips(collapse_duplicates=True)) == 2
+    assert database.merge_near_duplicates() == 3
+    assert sorted(clip['content'] for clip in database.get_all_clips()) == [
+        'Deploy Checklist for Friday', 'lunch   order',
+    ]
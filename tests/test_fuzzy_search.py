@@ -0,0 +1,29 @@
+from backend.fuzzy_search import TrigramIndex
+
+
+def trigram_df(database):
+    return dict(database.connection.execute('SELECT trigram, df FROM trigram_df').fetchall())
+
+
+def test_deleted_clips_leave_no_trigram_frequencies(make_db):
+    database = make_db()
+    kept = database.add_clip('kubernetes cluster', 'text')
+    dropped = database.add_clip('zephyr quokka', 'text')
+
+    assert database.delete_clip(dropped)
+
+    assert set(trigram_df(database)) == TrigramIndex.trigrams('kubernetes cluster')
+    assert all(df == 1 for df in trigram_df(database).values())
+    assert [clip['id'] for clip in database.fuzzy_search_clips('kubernets')] == [kept]
+
+
+def test_best_match_survives_the_candidate_cap(make_db, monkeypatch):
+    monkeypatch.setattr(TrigramIndex, 'MAX_CANDIDATES', 3)
+    database = make_db()
+    best = database.add_clip('quarterly revenue forecast', 'text')
+    for i in range(10):
+        database.add_clip(f'revenue note {i}', 'text')
+
+    results = database.fuzzy_search_clips('quartrly revenue forecast', min_similarity=0.3)
+
+    assert results[0]['id'] == best
@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+
+import pytest
+
+from backend.migrations import MIGRATIONS, Migration, MigrationRunner
+
+
+def make_legacy_db(path, contents):
+    """A database from before the aggregate tables, holding plain text clips"""
+    connection = sqlite3.connect(path)
+    MigrationRunner(connection, threading.RLock(), {}, MIGRATIONS[:1]).migrate()
+    connection.executemany("INSERT INTO clips (content, category) VALUES (?, 'text')",
+                           [(content,) for content in contents])
+    connection.commit()
+    connection.close()
+
+
+def counts(database):
+    stats = database.get_stats()
+    return stats['total']['clip_count'], sum(day['clip_count'] for day in stats['daily'])
+
+
+def test_new_database_is_current_with_nothing_to_backfill(make_db):
+    database = make_db()
+
+    assert database.migrations.version == database.migrations.latest_version
+    assert database.pending_backfills() == []
+
+    database.add_clip('first clip', 'text')
+    database.add_clip('https://example.org', 'url')
+    assert counts(database) == (2, 2)
+    assert set(database.get_stats()['categories']) == {'text', 'url'}
+
+
+def test_backfills_resume_and_stats_stay_correct_while_pending(tmp_path, make_db):
+    path = tmp_path / 'legacy.db'
+    make_legacy_db(str(path), [f'legacy clip number {i}' for i in range(5)])
+
+    database = make_db('legacy.db')
+    assert database.pending_backfills() == ['dedup', 'entities', 'stats', 'trigram', 'uuid']
+    database.add_clip('captured after the upgrade', 'text')
+    assert counts(database) == (6, 6)
+
+    # One batch, then a restart: the saved position is where the next run resumes
+    database.migrations._run_batch('stats', 2)
+    assert counts(database) == (6, 6)
+    database.close()
+
+    database = make_db('legacy.db')
+    assert counts(database) == (6, 6)
+    database.delete_clip(1)
+    database.delete_clip(4)
+    assert counts(database) == (4, 4)
+
+    assert database.run_backfills(batch_size=2) > 0
+    assert database.pending_backfills() == []
+    assert counts(database) == (4, 4)
+    assert all(clip['uuid'] for clip in database.iter_clip_batches())
+
+
+def test_failed_step_leaves_the_version_and_schema_unchanged():
+    connection = sqlite3.connect(':memory:')
+
+    def broken(cursor):
+        cursor.execute('CREATE TABLE half_done (id INTEGER)')
+        raise RuntimeError('interrupted')
+
+    runner = MigrationRunner(connection, threading.RLock(), {}, MIGRATIONS[:1] + [Migration(2, 'broken', broken)])
+    with pytest.raises(RuntimeError):
+        runner.migrate()
+
+    assert runner.version == 1
+    assert connection.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
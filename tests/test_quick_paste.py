@@ -0,0 +1,38 @@
+import threading
+import time
+
+
+def test_quick_paste_does_not_wait_for_the_database_lock(make_db):
+    database = make_db()
+    clip_id = database.add_clip('ssh deploy@example.org', 'text')
+    database.record_use(clip_id)
+
+    held, release = threading.Event(), threading.Event()
+
+    def long_write():
+        with database.lock:
+            held.set()
+            release.wait(5)
+
+    writer = threading.Thread(target=long_write)
+    writer.start()
+    held.wait()
+    try:
+        started = time.monotonic()
+        results = database.quick_paste('deploy')
+        assert time.monotonic() - started < 0.5
+    finally:
+        release.set()
+        writer.join()
+    assert [clip['id'] for clip in results] == [clip_id]
+
+
+def test_quick_paste_picks_up_clips_from_another_connection(make_db):
+    database = make_db()
+    monitor = make_db()  # Same file, as the background monitor process opens it
+    monitor.add_clip('copied by the monitor', 'text')
+
+    deadline = time.monotonic() + 3 * database.REFRESH_INTERVAL
+    while not database.quick_paste('monitor') and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert [clip['preview'] for clip in database.quick_paste('monitor')] == ['copied by the monitor']
@@ -0,0 +1,83 @@
+import itertools
+
+import pytest
+
+from backend.sync import ClipSyncer
+
+
+def clip_state(database):
+    """What a user sees of every clip, keyed by uuid"""
+    rows = database.connection.execute('SELECT uuid, content, is_pinned, is_favorite FROM clips').fetchall()
+    return {row['uuid']: (row['content'], bool(row['is_pinned']), bool(row['is_favorite'])) for row in rows}
+
+
+def clip_id(database, clip_uuid):
+    return database.connection.execute('SELECT id FROM clips WHERE uuid = ?', (clip_uuid,)).fetchone()['id']
+
+
+@pytest.fixture
+def replicas(make_db):
+    """Two synced databases sharing one clip; returns (a, b, syncer, clip uuid)"""
+    a, b = make_db('a.db'), make_db('b.db')
+    a.add_clip('first draft', 'text')
+    syncer = ClipSyncer(a)
+    syncer.sync_with(b)
+    clip_uuid = next(iter(clip_state(a)))
+    return a, b, syncer, clip_uuid
+
+
+def test_pin_does_not_undo_a_newer_edit(replicas):
+    a, b, syncer, clip_uuid = replicas
+    a.update_clip(clip_id(a, clip_uuid), 'edited on a')
+    b.update_clip(clip_id(b, clip_uuid), 'edited on b')
+    a.toggle_pin(clip_id(a, clip_uuid))
+
+    syncer.sync_with(b)
+
+    assert clip_state(a) == clip_state(b) == {clip_uuid: ('edited on b', True, False)}
+
+
+def test_edit_does_not_undo_a_newer_flag(replicas):
+    a, b, syncer, clip_uuid = replicas
+    b.toggle_favorite(clip_id(b, clip_uuid))
+    a.update_clip(clip_id(a, clip_uuid), 'edited on a')
+    b.toggle_favorite(clip_id(b, clip_uuid))
+    a.toggle_favorite(clip_id(a, clip_uuid))
+
+    syncer.sync_with(b)
+
+    assert clip_state(a) == clip_state(b) == {clip_uuid: ('edited on a', False, True)}
+
+
+OPS = {
+    'edit': lambda database, clip, side: database.update_clip(clip, f'edited on {side}'),
+    'pin': lambda database, clip, side: database.toggle_pin(clip),
+    'favorite': lambda database, clip, side: database.toggle_favorite(clip),
+}
+
+
+@pytest.mark.parametrize('schedule', list(itertools.product(
+    itertools.product(('a', 'b'), OPS), repeat=3
+)), ids=lambda schedule: '-'.join(f'{side}:{op}' for side, op in schedule))
+def test_interleaved_edits_and_flags_converge(replicas, schedule):
+    a, b, syncer, clip_uuid = replicas
+    sides = {'a': a, 'b': b}
+    for side, op in schedule:
+        database = sides[side]
+        OPS[op](database, clip_id(database, clip_uuid), side)
+
+    syncer.sync_with(b)
+    assert clip_state(a) == clip_state(b)
+
+    # A second round has nothing left to exchange
+    assert syncer.sync_with(b) == {'pulled': 0, 'pushed': 0}
+
+
+def test_delete_wins_over_concurrent_pin(replicas):
+    a, b, syncer, clip_uuid = replicas
+    b.toggle_pin(clip_id(b, clip_uuid))
+    a.delete_clip(clip_id(a, clip_uuid))
+
+    syncer.sync_with(b)
+
+    assert clip_state(a) == clip_state(b) == {}